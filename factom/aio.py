@@ -0,0 +1,554 @@
+import asyncio
+import json
+import ssl
+import time
+from collections import deque
+from typing import List, Union
+
+import factom.utils as utils
+
+from .batch import AsyncBatch
+from .client import NULL_BLOCK, BaseAPI, Factomd, FactomWalletd
+from .exceptions import handle_error_response
+from .session import RETRY_STATUS_CODES
+
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no-cover
+    aiohttp = None
+
+
+def _status(resp):
+    # aiohttp responses have a status rather than a status_code
+    return None if resp is None else resp.status
+
+
+async def _ordered_gather(coros, window: int):
+    """
+    An async generator that runs the coroutines from an async iterable
+    concurrently, at most `window` at a time, and yields their results in
+    order.
+    """
+    pending = deque()
+    try:
+        async for coro in coros:
+            pending.append(asyncio.ensure_future(coro))
+            if len(pending) >= window:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _aiter(iterable):
+    for item in iterable:
+        yield item
+
+
+class AsyncBaseAPI(BaseAPI):
+    # Requests always go to `url`, see `BaseAPI.multiple_hosts`
+    multiple_hosts = False
+
+    def __init__(self, *args, max_concurrency: int = 100, **kwargs):
+        """
+        Instantiate a new asyncio API client. Accepts the same arguments as
+        `BaseAPI`, except a list of hosts, `hedging`, `pool_size` and
+        `pool_block`, and requires the `aiohttp` package to be installed.
+        Connections are limited by `max_concurrency` instead.
+
+        Every API method returns an awaitable. Clients should be closed with
+        `await client.close()` when no longer needed, or used as an async
+        context manager.
+
+        Args:
+            max_concurrency (int): Maximum number of requests this client will
+                have in flight at once. Additional requests wait for a free
+                slot.
+        """
+        if aiohttp is None:
+            raise ImportError("The asyncio clients require aiohttp: pip install factom-api[async]")
+
+        if "pool_size" in kwargs or "pool_block" in kwargs:
+            raise TypeError("The asyncio clients take max_concurrency, not pool_size or "
+                            "pool_block")
+        super().__init__(*args, **kwargs)
+        if self.hedging is not None:
+            raise ValueError("The asyncio clients don't support hedging")
+        self.max_concurrency = max_concurrency
+        self._http = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def batch(self):
+        """
+        Start a batch of API calls which will be sent to the server in a single
+        JSON-RPC 2.0 batch request. See `factom.batch.AsyncBatch` for usage.
+        """
+        return AsyncBatch(self)
+
+    def _http_session(self):
+        # aiohttp sessions and asyncio semaphores must be created from within
+        # a running event loop, so both are deferred to the first request.
+        if self._http is None:
+            connector_kwargs = {"limit": self.max_concurrency}
+            if isinstance(self.session.verify, str):
+                connector_kwargs["ssl"] = ssl.create_default_context(cafile=self.session.verify)
+            timeout = self.session.timeout
+            if isinstance(timeout, tuple):
+                timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+            else:
+                timeout = aiohttp.ClientTimeout(total=timeout)
+            self._http = aiohttp.ClientSession(
+                headers=dict(self.session.headers),
+                connector=aiohttp.TCPConnector(**connector_kwargs),
+                timeout=timeout,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._http
+
+    async def _post(self, data, retry=False):
+        # Retries as `FactomAPISession.request()` does
+        http = self._http_session()
+        attempts = self.session.retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                async with self._semaphore:
+                    async with http.post(self.url, json=data) as resp:
+                        content = await resp.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last:
+                    raise
+            else:
+                if last or resp.status not in RETRY_STATUS_CODES:
+                    return resp, content
+            await asyncio.sleep(utils.backoff_delay(
+                attempt, self.session.backoff, self.session.max_backoff))
+
+    async def _request(self, method, params=None, request_id: int = 0):
+        cache_key = self._cache_key(method, params)
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return json.loads(cached)["result"]
+
+        data = self._payload(method, params, request_id)
+        start = time.perf_counter() if self.hooks else None
+        resp = content = None
+        try:
+            resp, content = await self._post(data, retry=method in self.idempotent_methods)
+            body = json.loads(content)
+
+            if resp.status >= 400:
+                handle_error_response(resp, body.get("error", {}))
+        except Exception as e:
+            if self.hooks:
+                self._emit(method, data, start, _status(resp), content, e)
+            raise
+        if self.hooks:
+            self._emit(method, data, start, _status(resp), content)
+
+        if cache_key is not None:
+            self._cache_set(cache_key, content)
+        return body["result"]
+
+    async def _request_batch(self, calls):
+        replies, data = self._prepare_batch(calls)
+
+        resp = None
+        if data:
+            start = time.perf_counter() if self.hooks else None
+            content = None
+            try:
+                retry = all(call["method"] in self.idempotent_methods for call in data)
+                resp, content = await self._post(data, retry=retry)
+
+                body = json.loads(content)
+                if isinstance(body, dict):
+                    # The server rejected the batch as a whole
+                    handle_error_response(resp, body.get("error", {}))
+            except Exception as e:
+                if self.hooks:
+                    self._emit("batch", data, start, _status(resp), content, e)
+                raise
+            if self.hooks:
+                self._emit("batch", data, start, _status(resp), content)
+            self._collect_batch(calls, replies, body)
+
+        return resp, self._order_batch(calls, replies)
+
+
+class AsyncFactomd(AsyncBaseAPI, Factomd):
+    """
+    An asyncio counterpart of `Factomd`. All API methods return awaitables,
+    and the convenience generators are async generators:
+
+        async with AsyncFactomd() as factomd:
+            async for entry in factomd.read_chain(chain_id):
+                ...
+    """
+    async def entry(self, entry_hash: Union[bytes, str], encode_as_hex: bool = False):
+        """
+        Get an Entry from factomd specified by the Entry Hash. If
+        `encode_as_hex` is True, content and external ids will be returned as
+        hex strings rather than bytes-objects.
+        """
+        resp = await self._request("entry", {"hash": utils.hex_from_bytes_or_string(entry_hash)})
+        if not encode_as_hex:
+            resp["extids"] = [bytes.fromhex(x) for x in resp["extids"]]
+            resp["content"] = bytes.fromhex(resp["content"])
+        return resp
+
+    # Convenience methods
+
+    async def entries_in_entry_block(
+        self,
+        block: dict,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+    ):
+        """
+        An async generator that yields all entries within a given entry block.
+        See `Factomd.entries_in_entry_block()`; concurrency is bounded by the
+        client's `max_concurrency`.
+        """
+        pointers = _aiter((block, entry_pointer) for entry_pointer in block["entrylist"])
+        async for entry in self._fetch_entries(pointers, include_entry_context, encode_as_hex,
+                                               prefetch):
+            yield entry
+
+    async def read_chain(
+        self,
+        chain_id: Union[bytes, str],
+        from_height: int = 0,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+        low_memory: bool = False,
+    ):
+        """
+        An async generator that yields all entries of a chain in order,
+        optionally starting from a given block height. See
+        `Factomd.read_chain()`; concurrency is bounded by the client's
+        `max_concurrency`.
+        """
+        entry_blocks = await self._chain_entry_blocks(chain_id, from_height, low_memory)
+
+        async def pointers():
+            for keymr, entry_block in entry_blocks:
+                if entry_block is None:
+                    entry_block = await self.entry_block(keymr)
+                for entry_pointer in entry_block["entrylist"]:
+                    yield entry_block, entry_pointer
+
+        async for entry in self._fetch_entries(pointers(), include_entry_context, encode_as_hex,
+                                               prefetch):
+            yield entry
+
+    async def read_chain_reverse(
+        self,
+        chain_id: Union[bytes, str],
+        limit: int = None,
+        until_height: int = 0,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+    ):
+        """
+        An async generator that yields the entries of a chain newest first. See
+        `Factomd.read_chain_reverse()`.
+        """
+        remaining = limit
+        keymr = (await self.chain_head(chain_id))["chainhead"]
+        while keymr != NULL_BLOCK and remaining != 0:
+            block = await self.entry_block(keymr)
+            if block["header"]["dbheight"] < until_height:
+                return
+            for entry_pointer in reversed(block["entrylist"]):
+                if remaining == 0:
+                    return
+                yield await self._entry_in_block(block, entry_pointer, include_entry_context,
+                                                 encode_as_hex)
+                if remaining is not None:
+                    remaining -= 1
+            keymr = block["header"]["prevkeymr"]
+
+    async def _chain_entry_blocks(
+        self,
+        chain_id: Union[bytes, str],
+        from_height: int,
+        low_memory: bool = False
+    ):
+        """
+        See `Factomd._chain_entry_blocks()`.
+        """
+        keymr = (await self.chain_head(chain_id))["chainhead"]
+
+        if self.chain_index is None:
+            stack = utils.PackedBlockStack() if low_memory else []
+            while keymr != NULL_BLOCK:
+                block = await self.entry_block(keymr)
+                if block["header"]["dbheight"] < from_height:
+                    break
+                if low_memory:
+                    stack.push(keymr, block["header"]["dbheight"])
+                else:
+                    stack.append((keymr, block))
+                keymr = block["header"]["prevkeymr"]
+            if low_memory:
+                return ((stack.pop()[0], None) for _ in range(len(stack)))
+            return (stack.pop() for _ in range(len(stack)))
+
+        chain_id = utils.hex_from_bytes_or_string(chain_id)
+        tip = self.chain_index.tip(chain_id)
+        fetched = {}
+        new_blocks = utils.PackedBlockStack()
+        while keymr != NULL_BLOCK and keymr != tip:
+            block = await self.entry_block(keymr)
+            if not low_memory:
+                fetched[keymr] = block
+            new_blocks.push(keymr, block["header"]["dbheight"])
+            keymr = block["header"]["prevkeymr"]
+        if tip is not None and keymr != tip:
+            self.chain_index.remove(chain_id)
+        self.chain_index.extend(chain_id, (new_blocks.pop() for _ in range(len(new_blocks))))
+
+        return ((keymr, fetched.pop(keymr, None))
+                for keymr, _ in self.chain_index.blocks(chain_id, from_height))
+
+    async def _fetch_entries(self, pointers, include_entry_context, encode_as_hex, prefetch):
+        def fetch(pointer):
+            block, entry_pointer = pointer
+            return self._entry_in_block(block, entry_pointer, include_entry_context,
+                                        encode_as_hex)
+
+        if prefetch > 0:
+            async for entry in _ordered_gather((fetch(p) async for p in pointers), prefetch):
+                yield entry
+        else:
+            async for pointer in pointers:
+                yield await fetch(pointer)
+
+    async def _entry_in_block(self, block, entry_pointer, include_entry_context, encode_as_hex):
+        entry = await self.entry(entry_pointer["entryhash"], encode_as_hex=encode_as_hex)
+        if include_entry_context:
+            entry["entryhash"] = entry_pointer["entryhash"]
+            entry["timestamp"] = entry_pointer["timestamp"]
+            entry["dbheight"] = block["header"]["dbheight"]
+        return entry
+
+    async def entries_at_height(
+        self,
+        chain_id: Union[bytes, str],
+        height: int,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False
+    ):
+        """
+        An async generator that yields all entries in a chain that occurred at
+        the given height.
+        """
+        entry_block_keymr = await self._entry_block_keymr_at_height(chain_id, height)
+        if entry_block_keymr is None:
+            return  # Early return, chain didn't have entries in this block
+
+        entry_block = await self.entry_block(entry_block_keymr)
+        async for entry in self.entries_in_entry_block(entry_block, include_entry_context,
+                                                       encode_as_hex):
+            yield entry
+
+    async def entry_blocks_in_range(
+        self,
+        chain_id: Union[bytes, str],
+        start_height: int,
+        end_height: int,
+        window: int = 16,
+    ):
+        """
+        An async generator that yields the (keymr, dbheight) pairs of a chain's
+        entry blocks between two directory block heights, inclusive. See
+        `Factomd.entry_blocks_in_range()`.
+
+        Args:
+            window (int): Number of directory blocks to fetch ahead.
+        """
+        async def lookup(height):
+            return await self._entry_block_keymr_at_height(chain_id, height), height
+
+        heights = _aiter(range(start_height, end_height + 1))
+        async for keymr, height in _ordered_gather((lookup(h) async for h in heights), window):
+            if keymr is not None:
+                yield keymr, height
+
+    async def read_chain_range(
+        self,
+        chain_id: Union[bytes, str],
+        start_height: int,
+        end_height: int,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        window: int = 16,
+        prefetch: int = 0,
+    ):
+        """
+        An async generator that yields the entries of a chain recorded between
+        two directory block heights, inclusive. See
+        `Factomd.read_chain_range()`.
+
+        Args:
+            window (int): Number of directory and entry blocks to fetch ahead.
+        """
+        blocks = self.entry_blocks_in_range(chain_id, start_height, end_height, window)
+        entry_blocks = _ordered_gather((self.entry_block(keymr) async for keymr, _ in blocks),
+                                       window)
+
+        async def pointers():
+            async for entry_block in entry_blocks:
+                for entry_pointer in entry_block["entrylist"]:
+                    yield entry_block, entry_pointer
+
+        async for entry in self._fetch_entries(pointers(), include_entry_context, encode_as_hex,
+                                               prefetch):
+            yield entry
+
+    async def entries_at_height_for_chains(
+        self,
+        chain_ids: List[Union[bytes, str]],
+        height: int,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+    ):
+        """
+        Return the entries of many chains that occurred at the given height,
+        fetching the directory block only once. See
+        `Factomd.entries_at_height_for_chains()`.
+        """
+        index = await self.directory_block_index(height)
+        chain_ids = {utils.hex_from_bytes_or_string(chain_id) for chain_id in chain_ids}
+        keymrs = [keymr for chain_id, keymr in index.items() if chain_id in chain_ids]
+
+        if prefetch > 0:
+            entry_blocks = _ordered_gather((self.entry_block(k) async for k in _aiter(keymrs)),
+                                           prefetch)
+        else:
+            entry_blocks = (await self.entry_block(k) async for k in _aiter(keymrs))
+        pointers = ((entry_block, entry_pointer)
+                    async for entry_block in entry_blocks
+                    for entry_pointer in entry_block["entrylist"])
+
+        results = {}
+        async for entry in self._fetch_entries(pointers, include_entry_context, encode_as_hex,
+                                               prefetch):
+            results.setdefault(entry["chainid"], []).append(entry)
+        return results
+
+    async def directory_block_index(self, height: int):
+        """
+        Return a dict mapping the hex ids of the chains with entries in the
+        directory block at the given height to the keymrs of their entry
+        blocks. See `Factomd.directory_block_index()`.
+        """
+        index = self.directory_block_index_cache.get(height)
+        if index is None:
+            directory_block = (await self.directory_block_by_height(height))["dblock"]
+            index = self._index_directory_block(directory_block)
+            self.directory_block_index_cache.set(height, index, self._index_size(index))
+        return index
+
+    async def _entry_block_keymr_at_height(self, chain_id: Union[bytes, str], height: int):
+        index = await self.directory_block_index(height)
+        return index.get(utils.hex_from_bytes_or_string(chain_id))
+
+
+class AsyncFactomWalletd(AsyncBaseAPI, FactomWalletd):
+    """
+    An asyncio counterpart of `FactomWalletd`. All API methods return
+    awaitables, and the shortcut methods expect an `AsyncFactomd` instance.
+    """
+    async def new_chain(
+        self,
+        factomd: AsyncFactomd,
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+        sleep: float = 1.0,
+    ):
+        """
+        Shortcut method to create a new chain and initial entry. See
+        `FactomWalletd.new_chain()`.
+        """
+        calls = await self.compose_chain(ext_ids, content, ec_address)
+        await factomd.commit_chain(calls["commit"]["params"]["message"])
+        await asyncio.sleep(sleep)
+        return await factomd.reveal_chain(calls["reveal"]["params"]["entry"])
+
+    async def new_entry(
+        self,
+        factomd: AsyncFactomd,
+        chain_id: Union[bytes, str],
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+        sleep: float = 1.0,
+    ):
+        """
+        Shortcut method to create a new entry. See `FactomWalletd.new_entry()`.
+        """
+        calls = await self.compose_entry(chain_id, ext_ids, content, ec_address)
+        await factomd.commit_entry(calls["commit"]["params"]["message"])
+        await asyncio.sleep(sleep)
+        return await factomd.reveal_entry(calls["reveal"]["params"]["entry"])
+
+    async def fct_to_ec(
+        self,
+        factomd: AsyncFactomd,
+        amount: int,
+        fct_address: str = None,
+        ec_address: str = None
+    ):
+        """
+        Shortcut method to create a factoid to entry credit transaction. See
+        `FactomWalletd.fct_to_ec()`.
+        """
+        name = self._xact_name()
+        await self.new_transaction(name)
+        await self.add_input(name, amount, fct_address)
+        await self.add_ec_output(name, amount, ec_address)
+        await self.add_fee(name, fct_address)
+        await self.sign_transaction(name)
+        call = await self.compose_transaction(name)
+        return await factomd.factoid_submit(call["params"]["transaction"])
+
+    async def fct_to_fct(
+        self,
+        factomd: AsyncFactomd,
+        amount: int,
+        fct_to: str,
+        fct_from: str = None
+    ):
+        """
+        Shortcut method to create a factoid to factoid transaction. See
+        `FactomWalletd.fct_to_fct()`.
+        """
+        name = self._xact_name()
+        await self.new_transaction(name)
+        await self.add_input(name, amount, fct_from)
+        await self.add_output(name, amount, fct_to)
+        await self.add_fee(name, fct_from)
+        await self.sign_transaction(name)
+        call = await self.compose_transaction(name)
+        return await factomd.factoid_submit(call["params"]["transaction"])
@@ -0,0 +1,210 @@
+import inspect
+
+from .exceptions import handle_error_response
+
+
+class BatchCall:
+    """
+    A single API call queued on a `Batch`. The result becomes available once
+    the batch has been sent.
+    """
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.method = None
+        self.params = None
+        self.done = False
+        self._result = None
+        self._exception = None
+
+    def result(self):
+        """
+        Return the result of the call, raising the `FactomAPIError` returned
+        by the server if the call failed.
+        """
+        if not self.done:
+            raise RuntimeError("The batch containing this call has not been sent yet")
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        if not self.done:
+            raise RuntimeError("The batch containing this call has not been sent yet")
+        return self._exception
+
+
+class Batch:
+    """
+    Queues API calls and sends them to the server as a single JSON-RPC 2.0
+    batch request, saving a round trip per call. Any client method which makes
+    exactly one API request of its own can be queued by calling it on the
+    batch instead of the client:
+
+        with factomd.batch() as batch:
+            entry = batch.entry(entry_hash)
+            block = batch.entry_block(keymr)
+
+        entry.result()
+
+    The batch is sent when the `with` block exits, or explicitly via `send()`.
+    Calls are matched back to their replies by request id, and errors are
+    raised per call when `BatchCall.result()` is called. Methods which call
+    other API methods, or take another client, raise TypeError when queued,
+    before anything is sent.
+
+    Args:
+        api (BaseAPI): The client the calls are made against.
+    """
+    def __init__(self, api):
+        self.api = api
+        self.calls = []
+
+    def __getattr__(self, name):
+        func = getattr(type(self.api), name, None)
+        if not callable(func) or name.startswith("_"):
+            raise AttributeError("'{}' is not a queueable API method".format(name))
+
+        def queue(*args, **kwargs):
+            from .client import BaseAPI
+            if any(isinstance(arg, BaseAPI) for arg in list(args) + list(kwargs.values())):
+                raise TypeError("{}() calls another client and cannot be batched".format(name))
+            call = BatchCall(func, args, kwargs)
+            call.method, call.params = _capture(call, self._proxy())
+            self.calls.append(call)
+            return call
+
+        return queue
+
+    def __len__(self):
+        return len(self.calls)
+
+    def _proxy(self, resp=None, reply=None):
+        return _APIProxy(self.api, resp, reply)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.send()
+
+    def send(self):
+        """
+        Send all queued calls in a single request and resolve their results.
+
+        Returns:
+            list[BatchCall]: The calls which were sent, in the order they were
+                queued.
+        """
+        calls, self.calls = self.calls, []
+        if not calls:
+            return calls
+
+        resp, replies = self.api._request_batch([(c.method, c.params) for c in calls])
+        for call, reply in zip(calls, replies):
+            try:
+                call._result = call.func(self._proxy(resp, reply), *call.args, **call.kwargs)
+            except Exception as e:
+                call._exception = e
+            call.done = True
+        return calls
+
+
+class AsyncBatch(Batch):
+    """
+    The `Batch` counterpart for the asyncio clients. Use `async with` or
+    `await batch.send()` to send the queued calls. Queued coroutines are run up
+    to their first request, and refused the same way as by `Batch` if they use
+    anything else which could reach the server.
+    """
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.send()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        raise TypeError("Use 'async with' with an AsyncBatch")
+
+    def _proxy(self, resp=None, reply=None):
+        return _AsyncAPIProxy(self.api, resp, reply)
+
+    async def send(self):
+        calls, self.calls = self.calls, []
+        if not calls:
+            return calls
+
+        resp, replies = await self.api._request_batch([(c.method, c.params) for c in calls])
+        for call, reply in zip(calls, replies):
+            try:
+                call._result = await call.func(self._proxy(resp, reply), *call.args,
+                                               **call.kwargs)
+            except Exception as e:
+                call._exception = e
+            call.done = True
+        return calls
+
+
+class _Captured(Exception):
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+
+
+# Client attributes a queued method may use other than `_request`. Any other
+# method, or the connection itself, could reach the server outside the batch
+_PROXY_HELPERS = frozenset({"_payload", "_xact_name"})
+_PROXY_REFUSED = frozenset({"session", "pool", "hedging", "_http", "_semaphore"})
+
+
+class _APIProxy:
+    """
+    Stands in for the client while a queued method runs, either capturing the
+    request it makes or handing it the reply received in the batch response.
+    """
+    def __init__(self, api, resp=None, reply=None):
+        self._api = api
+        self._resp = resp
+        self._reply = reply
+        self._requests = 0
+
+    def __getattr__(self, name):
+        value = getattr(self._api, name)
+        if name in _PROXY_REFUSED or (callable(value) and name not in _PROXY_HELPERS):
+            raise TypeError("Batched methods may only make a single API request, "
+                            "not use {}".format(name))
+        return value
+
+    def _request(self, method, params=None, request_id: int = 0):
+        if self._reply is None:
+            raise _Captured(method, params)
+
+        self._requests += 1
+        if self._requests > 1:
+            raise TypeError("Batched methods may only make a single API request")
+        if "error" in self._reply:
+            handle_error_response(self._resp, self._reply["error"])
+        return self._reply["result"]
+
+
+class _AsyncAPIProxy(_APIProxy):
+    async def _request(self, method, params=None, request_id: int = 0):
+        return super()._request(method, params, request_id)
+
+
+def _capture(call, proxy):
+    try:
+        result = call.func(proxy, *call.args, **call.kwargs)
+        if inspect.iscoroutine(result):
+            # Run the coroutine up to its first request
+            try:
+                result.send(None)
+            finally:
+                result.close()
+    except _Captured as captured:
+        return captured.method, captured.params
+    raise TypeError("{}() does not make a single API request and cannot be batched".format(
+        call.func.__name__))
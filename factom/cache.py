@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+
+class BaseCache:
+    """
+    Interface for caches of immutable API results. Keys are strings identifying
+    an API call and values are the raw JSON-RPC response bodies as bytes.
+    Implementations must be safe to use from multiple threads.
+    """
+    def get(self, key: str):
+        """
+        Return the cached value for `key`, or None if it isn't cached.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCache(BaseCache):
+    """
+    An in-memory least recently used cache which evicts entries once the total
+    size of cached values exceeds a byte budget.
+
+    Args:
+        max_bytes (int): Maximum total size of cached values. Values larger
+            than this are never cached. Defaults to 64MiB.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key: str):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value[0]
+
+    def set(self, key: str, value: bytes, size: int = None):
+        """
+        Cache a value. `size` may be given to cache values other than bytes,
+        and otherwise defaults to `len(value)`.
+        """
+        if size is None:
+            size = len(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._data[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+                self.evicted_bytes += evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    @property
+    def stats(self):
+        """
+        A dict of counters describing the cache's current size and
+        effectiveness.
+        """
+        return {
+            "entries": len(self._data),
+            "size": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+__all__ = ["BaseCache", "LRUCache"]
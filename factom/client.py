@@ -1,19 +1,43 @@
+import json
 import random
 import string
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 from typing import List, Union
 from urllib.parse import urljoin
 
+from requests.exceptions import ConnectionError, Timeout
+
 import factom.utils as utils
 
-from .exceptions import handle_error_response
-from .session import FactomAPISession
+from .batch import Batch
+from .cache import LRUCache
+from .exceptions import FactomAPIError, handle_error_response
+from .metrics import RPCEvent, emit
+from .pool import NodePool
+from .session import RETRY_STATUS_CODES, FactomAPISession
 
 
 NULL_BLOCK = "0000000000000000000000000000000000000000000000000000000000000000"
 
 
+def _reply(resp):
+    # The status and content of a response for metrics, if there was one
+    return (None, None) if resp is None else (resp.status_code, resp.content)
+
+
 class BaseAPI(object):
+    # API methods whose results are keyed by a hash and never change, and so
+    # may be served from `cache`
+    cacheable_methods = frozenset()
+    # API methods which only read, and so may be retried. Never anything which
+    # commits, reveals or spends
+    idempotent_methods = frozenset()
+    # Whether reads may be spread over several instances, which must then
+    # hold no state of their own
+    multiple_hosts = False
+
     def __init__(
         self,
         ec_address=None,
@@ -22,7 +46,15 @@ class BaseAPI(object):
         version="v2",
         username=None,
         password=None,
-        certfile=None
+        certfile=None,
+        cache=None,
+        store=None,
+        pool_size=10,
+        pool_block=False,
+        timeout=None,
+        retries=0,
+        hedging=None,
+        hooks=None
     ):
         """
         Instantiate a new API client.
@@ -33,22 +65,62 @@ class BaseAPI(object):
                 with the exception of the `fct_to_ec()` shortcut.
             fct_address (str): A default factoid address to use for
                 transactions. Factoids will be spent from this address.
-            host (str): Hostname, including http(s)://, of the factomd
-                or factom-walletd instance to query.
+            host (Union[str, list, factom.pool.NodePool]): Hostname,
+                including http(s)://, of the factomd or factom-walletd
+                instance to query. For factomd, a list of hostnames, or a
+                `NodePool` for control over health checks, spreads reads over
+                several instances and sends writes to the first, or
+                preferred, one.
             version (str): API version to use. This should remain 'v2'.
             username (str): RPC username for protected APIs.
             password (str): RPC password for protected APIs.
             certfile (str): Path to certificate file to verify for TLS
                 connections (mostly untested).
+            cache (factom.cache.BaseCache): A cache for the results of API
+                calls which never change, such as entries and blocks fetched
+                by hash. See `factom.cache.LRUCache`.
+            store (factom.store.BlockStore): A persistent store for the same
+                results, checked after `cache` and before the server.
+            pool_size (int): Maximum number of connections kept open to the
+                server. Clients shared by many threads should allow one per
+                thread.
+            pool_block (bool): Make threads wait for a pooled connection
+                rather than opening extra ones. See `FactomAPISession`.
+            timeout (Union[float, tuple]): Timeout in seconds for requests, or
+                a (connect timeout, read timeout) tuple.
+            retries (int): Number of times to retry calls to read-only API
+                methods which fail to connect, time out or get a gateway
+                error, with jittered exponential backoff. Calls which commit,
+                reveal or submit anything are never retried.
+            hedging (factom.pool.HedgingPolicy): With several hosts, also send
+                reads which are slow to be answered to a second host, and use
+                whichever reply comes first.
+            hooks (list): Callables passed a `factom.metrics.RPCEvent` after
+                each call sent to the server, such as a
+                `factom.metrics.RPCMetrics`.
         """
         self.ec_address = ec_address
         self.fct_address = fct_address
         self.version = version
-
-        if host:
+        self.cache = cache
+        self.store = store
+
+        self.hedging = hedging
+        self.hooks = list(hooks or ())
+        self.pool = None
+        self._checking = threading.Lock()
+        if isinstance(host, (list, tuple, NodePool)) and not self.multiple_hosts:
+            raise ValueError("{} only takes a single host".format(type(self).__name__))
+        if isinstance(host, (list, tuple)):
+            host = NodePool(list(host))
+        if isinstance(host, NodePool):
+            self.pool = host
+            self.host = host.preferred.host
+        elif host:
             self.host = host
 
-        self.session = FactomAPISession()
+        self.session = FactomAPISession(
+            pool_size=pool_size, pool_block=pool_block, timeout=timeout, retries=retries)
 
         if username and password:
             self.session.init_basic_auth(username, password)
@@ -64,21 +136,278 @@ class BaseAPI(object):
     def _xact_name():
         return "TX_{}".format("".join(random.choices(string.ascii_uppercase + string.digits, k=6)))
 
-    def _request(self, method, params=None, request_id: int = 0):
+    def batch(self):
+        """
+        Start a batch of API calls which will be sent to the server in a single
+        JSON-RPC 2.0 batch request. See `factom.batch.Batch` for usage.
+        """
+        return Batch(self)
+
+    @staticmethod
+    def _payload(method, params=None, request_id: int = 0):
         data = {"jsonrpc": "2.0", "id": request_id, "method": method}
         if params:
             data["params"] = params
+        return data
+
+    def _cache_key(self, method, params):
+        if method not in self.cacheable_methods or (self.cache is None and self.store is None):
+            return None
+        return "{}:{}".format(method, json.dumps(params, sort_keys=True))
+
+    def _cache_get(self, cache_key):
+        if self.cache is not None:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                return content
+        if self.store is not None:
+            content = self.store.get(cache_key)
+            if content is not None and self.cache is not None:
+                self.cache.set(cache_key, content)
+            return content
+        return None
+
+    def _cache_set(self, cache_key, content):
+        if self.cache is not None:
+            self.cache.set(cache_key, content)
+        if self.store is not None:
+            self.store.set(cache_key, content)
 
-        resp = self.session.request("POST", self.url, json=data)
-
-        if resp.status_code >= 400:
-            handle_error_response(resp)
+    def _request(self, method, params=None, request_id: int = 0):
+        cache_key = self._cache_key(method, params)
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return json.loads(cached)["result"]
+
+        data = self._payload(method, params, request_id)
+        start = time.perf_counter() if self.hooks else None
+        resp = None
+        try:
+            resp = self._post(data, retry=method in self.idempotent_methods)
+
+            if resp.status_code >= 400:
+                handle_error_response(resp)
+
+            result = resp.json()["result"]
+        except Exception as e:
+            if self.hooks:
+                self._emit(method, data, start, *_reply(resp), e)
+            raise
+        if self.hooks:
+            self._emit(method, data, start, *_reply(resp))
+
+        if cache_key is not None:
+            self._cache_set(cache_key, resp.content)
+        return result
+
+    def _request_batch(self, calls):
+        """
+        Send a list of (method, params) tuples as a single batch request.
+        Returns the HTTP response along with the list of replies, ordered to
+        match `calls`. Calls with cached results are answered from the cache
+        and left out of the request.
+        """
+        replies, data = self._prepare_batch(calls)
+
+        resp = None
+        if data:
+            retry = all(call["method"] in self.idempotent_methods for call in data)
+            start = time.perf_counter() if self.hooks else None
+            try:
+                resp = self._post(data, retry=retry)
+
+                body = resp.json()
+                if isinstance(body, dict):
+                    # The server rejected the batch as a whole
+                    handle_error_response(resp)
+            except Exception as e:
+                if self.hooks:
+                    self._emit("batch", data, start, *_reply(resp), e)
+                raise
+            if self.hooks:
+                self._emit("batch", data, start, *_reply(resp))
+            self._collect_batch(calls, replies, body)
+
+        return resp, self._order_batch(calls, replies)
+
+    def _emit(self, method, data, start, status, content, error=None):
+        # Only called with hooks set, so that sizes aren't worked out for nothing
+        emit(self.hooks, RPCEvent(
+            method=method,
+            duration=time.perf_counter() - start,
+            request_bytes=len(json.dumps(data)),
+            response_bytes=0 if content is None else len(content),
+            status=status,
+            error_code=error.code if isinstance(error, FactomAPIError) else None,
+            error=None if error is None else type(error).__name__,
+        ))
+
+    def _post(self, data, retry=False):
+        if self.pool is None:
+            return self.session.request("POST", self.url, json=data, retry=retry)
+
+        # One check at a time, however long a node takes to answer
+        if self.pool.check_due() and self._checking.acquire(blocking=False):
+            threading.Thread(target=self._check_nodes_in_background, daemon=True).start()
+
+        if retry and self.hedging is not None and len(self.pool.nodes) > 1:
+            return self._post_hedged(data)
+
+        # Reads fail over to the other nodes, writes may only be sent once
+        tried = []
+        while True:
+            node = self.pool.acquire(write=not retry, exclude=tried)
+            try:
+                return self._post_node(node, data, retry)
+            except (ConnectionError, Timeout):
+                tried.append(node)
+                if not retry or len(tried) >= len(self.pool.nodes):
+                    raise
+
+    def _post_hedged(self, data):
+        self.hedging.count()
+        first = self.pool.acquire()
+        future, started = self.hedging.submit(self._post_node, first, data, True)
+        futures = {future: first}
+        # Time spent queued for a thread isn't the node's latency
+        started.wait()
+        done, _ = wait(futures, timeout=self.hedging.delay)
+        failed = bool(done) and future.exception() is not None
+        if failed or (not done and not self.hedging.saturated):
+            self.hedging.count(hedged=True)
+            second = self.pool.acquire(exclude=[first])
+            futures[self.hedging.submit(self._post_node, second, data, True)[0]] = second
+
+        # The first reply wins, unless it is an error and the other may not be
+        pending = set(futures)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        # A read which never started never releases its node
+                        if loser.cancel():
+                            self.pool.release(futures[loser])
+                    return future.result()
+            if not pending:
+                return future.result()
+
+    def _post_node(self, node, data, retry):
+        # Send a request to one node of the pool, which must be acquired
+        start = time.monotonic()
+        failed = True
+        try:
+            resp = self.session.request(
+                "POST", urljoin(node.host, self.version), json=data, retry=retry)
+            failed = resp.status_code in RETRY_STATUS_CODES
+            return resp
+        finally:
+            self.pool.release(node, failed)
+            if retry and not failed and self.hedging is not None:
+                self.hedging.record(time.monotonic() - start)
+
+    def check_nodes(self):
+        """
+        Query the height of each node in the pool, marking those behind the
+        others so that reads avoid them. Called in the background every
+        `NodePool.check_interval` seconds, and does nothing for a single host.
+        """
+        if self.pool is None:
+            return
+        self.pool.update_heights({node: self._node_height(node) for node in self.pool.nodes})
+
+    def _check_nodes_in_background(self):
+        try:
+            self.check_nodes()
+        finally:
+            self._checking.release()
+
+    def _node_height(self, node):
+        # The block height of one node, or None if unknown
+        return None
+
+    def _prepare_batch(self, calls):
+        replies = {}
+        data = []
+        for i, (method, params) in enumerate(calls):
+            cache_key = self._cache_key(method, params)
+            cached = self._cache_get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                replies[i] = json.loads(cached)
+            else:
+                data.append(self._payload(method, params, i))
+        return replies, data
+
+    def _collect_batch(self, calls, replies, body):
+        for reply in body:
+            request_id = reply.get("id")
+            if request_id not in range(len(calls)):
+                continue
+            replies[request_id] = reply
+            cache_key = self._cache_key(*calls[request_id])
+            if cache_key is not None and "result" in reply:
+                self._cache_set(cache_key, json.dumps(reply).encode())
 
-        return resp.json()["result"]
+    @staticmethod
+    def _order_batch(calls, replies):
+        missing = {"error": {"code": -1, "message": "No reply received for batched call"}}
+        return [replies.get(i, missing) for i in range(len(calls))]
 
 
 class Factomd(BaseAPI):
     host = "http://localhost:8088"
+    multiple_hosts = True
+    cacheable_methods = frozenset({
+        "admin-block",
+        "directory-block",
+        "entry",
+        "entry-block",
+        "entrycredit-block",
+        "factoid-block",
+        "raw-data",
+        "transaction",
+    })
+    idempotent_methods = cacheable_methods | frozenset({
+        "ablock-by-height",
+        "anchors",
+        "chain-head",
+        "current-minute",
+        "dblock-by-height",
+        "directory-block-head",
+        "ecblock-by-height",
+        "entry-credit-balance",
+        "entry-credit-rate",
+        "factoid-balance",
+        "fblock-by-height",
+        "heights",
+        "multiple-ec-balances",
+        "multiple-fct-balances",
+        "pending-entries",
+        "pending-transactions",
+        "properties",
+        "receipt",
+    })
+
+    def __init__(self, *args, chain_index=None, directory_block_index_cache=None, **kwargs):
+        """
+        Instantiate a new factomd API client. Accepts the same arguments as
+        `BaseAPI`, along with:
+
+        Args:
+            chain_index (factom.index.ChainIndex): An index of the entry blocks
+                in each chain. When given, `read_chain()` records the entry
+                blocks it finds and later reads of the same chain only walk
+                back as far as the last indexed block.
+            directory_block_index_cache (factom.cache.LRUCache): Cache for the
+                chain id to entry block lookups built from each directory block
+                by `directory_block_index()`. Defaults to a 16MiB LRU cache.
+        """
+        super().__init__(*args, **kwargs)
+        self.chain_index = chain_index
+        if directory_block_index_cache is None:
+            directory_block_index_cache = LRUCache(16 * 1024 * 1024)
+        self.directory_block_index_cache = directory_block_index_cache
 
     def admin_block(self, keymr: Union[bytes, str]):
         """
@@ -267,6 +596,17 @@ class Factomd(BaseAPI):
         """
         return self._request("heights")
 
+    def _node_height(self, node):
+        # Entries are only readable up to the lower of the two heights
+        try:
+            resp = self.session.request(
+                "POST", urljoin(node.host, self.version), json=self._payload("heights"),
+                timeout=self.pool.check_timeout)
+            result = resp.json()["result"]
+        except (ConnectionError, Timeout, KeyError, ValueError):
+            return None
+        return min(result["directoryblockheight"], result["entryheight"])
+
     def multiple_entry_credit_balances(self, ec_address_list: List[str]):
         """
         Used to query the acknowledged and saved balances for a list of entry
@@ -354,18 +694,23 @@ class Factomd(BaseAPI):
         self,
         block: dict,
         include_entry_context: bool = False,
-        encode_as_hex: bool = False
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+        max_workers: int = None,
     ):
         """
         A generator that yields all entries within a given entry block.
+
+        Args:
+            prefetch (int): Number of entries to fetch ahead of the one being
+                yielded. Entries are fetched in parallel but always yielded in
+                block order. The default of 0 fetches one entry at a time.
+            max_workers (int): Maximum number of entry requests in flight when
+                prefetching. Defaults to `prefetch`.
         """
-        for entry_pointer in block["entrylist"]:
-            entry = self.entry(entry_pointer["entryhash"], encode_as_hex=encode_as_hex)
-            if include_entry_context:
-                entry["entryhash"] = entry_pointer["entryhash"]
-                entry["timestamp"] = entry_pointer["timestamp"]
-                entry["dbheight"] = block["header"]["dbheight"]
-            yield entry
+        pointers = ((block, entry_pointer) for entry_pointer in block["entrylist"])
+        yield from self._fetch_entries(pointers, include_entry_context, encode_as_hex,
+                                       prefetch, max_workers)
 
     def read_chain(
         self,
@@ -373,28 +718,146 @@ class Factomd(BaseAPI):
         from_height: int = 0,
         include_entry_context: bool = False,
         encode_as_hex: bool = False,
+        prefetch: int = 0,
+        max_workers: int = None,
+        low_memory: bool = False,
     ):
         """
         A generator that yields all entries of a chain in order, optionally
         starting from a given block height.
+
+        Args:
+            prefetch (int): Number of entries to fetch ahead of the one being
+                yielded, across entry block boundaries. Entries are fetched in
+                parallel but always yielded in chain order. The default of 0
+                fetches one entry at a time.
+            max_workers (int): Maximum number of entry requests in flight when
+                prefetching. Defaults to `prefetch`.
+            low_memory (bool): Only keep the keymr and height of each entry
+                block while walking the chain, and fetch the blocks again as
+                they are read. Memory use stays flat however long the chain,
+                at the cost of fetching each block twice unless the client has
+                a cache.
+        """
+        entry_blocks = self._chain_entry_blocks(chain_id, from_height, low_memory)
+
+        def pointers():
+            for keymr, entry_block in entry_blocks:
+                if entry_block is None:
+                    entry_block = self.entry_block(keymr)
+                for entry_pointer in entry_block["entrylist"]:
+                    yield entry_block, entry_pointer
+
+        yield from self._fetch_entries(pointers(), include_entry_context, encode_as_hex,
+                                       prefetch, max_workers)
+
+    def read_chain_reverse(
+        self,
+        chain_id: Union[bytes, str],
+        limit: int = None,
+        until_height: int = 0,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+    ):
+        """
+        A generator that yields the entries of a chain newest first, walking
+        back from the chain head. Nothing is fetched ahead of what is yielded,
+        so reading the latest few entries of a chain costs the same however
+        long the chain is.
+
+        Args:
+            limit (int): Maximum number of entries to yield.
+            until_height (int): Stop at entry blocks below this height.
+        """
+        remaining = limit
+        keymr = self.chain_head(chain_id)["chainhead"]
+        while keymr != NULL_BLOCK and remaining != 0:
+            block = self.entry_block(keymr)
+            if block["header"]["dbheight"] < until_height:
+                return
+            for entry_pointer in reversed(block["entrylist"]):
+                if remaining == 0:
+                    return
+                yield self._entry_in_block(block, entry_pointer, include_entry_context,
+                                           encode_as_hex)
+                if remaining is not None:
+                    remaining -= 1
+            keymr = block["header"]["prevkeymr"]
+
+    def _chain_entry_blocks(
+        self,
+        chain_id: Union[bytes, str],
+        from_height: int,
+        low_memory: bool = False
+    ):
+        """
+        Find the entry blocks of a chain at or above `from_height`. Returns an
+        iterator of (keymr, block) tuples in chain order, where the block is
+        None if it still has to be fetched. In `low_memory` mode no blocks are
+        kept, only their keymrs.
         """
-        # Walk the entry block chain backwards to build up a stack of entry
-        # blocks to fetch
-        entry_blocks = []
         keymr = self.chain_head(chain_id)["chainhead"]
-        while keymr != NULL_BLOCK:
+
+        if self.chain_index is None:
+            # Walk the entry block chain backwards to build up a stack of entry
+            # blocks to fetch, then pop them off in chain order
+            stack = utils.PackedBlockStack() if low_memory else []
+            while keymr != NULL_BLOCK:
+                block = self.entry_block(keymr)
+                if block["header"]["dbheight"] < from_height:
+                    break
+                if low_memory:
+                    stack.push(keymr, block["header"]["dbheight"])
+                else:
+                    stack.append((keymr, block))
+                keymr = block["header"]["prevkeymr"]
+            if low_memory:
+                return ((stack.pop()[0], None) for _ in range(len(stack)))
+            return (stack.pop() for _ in range(len(stack)))
+
+        # Only walk back as far as the last indexed block. The index must hold
+        # the whole chain, so the first walk of a chain ignores `from_height`.
+        chain_id = utils.hex_from_bytes_or_string(chain_id)
+        tip = self.chain_index.tip(chain_id)
+        fetched = {}
+        new_blocks = utils.PackedBlockStack()
+        while keymr != NULL_BLOCK and keymr != tip:
             block = self.entry_block(keymr)
-            if block["header"]["dbheight"] < from_height:
-                break
-            entry_blocks.append(block)
+            if not low_memory:
+                fetched[keymr] = block
+            new_blocks.push(keymr, block["header"]["dbheight"])
             keymr = block["header"]["prevkeymr"]
+        if tip is not None and keymr != tip:
+            # The chain head doesn't lead back to the indexed blocks, rebuild
+            self.chain_index.remove(chain_id)
+        self.chain_index.extend(chain_id, (new_blocks.pop() for _ in range(len(new_blocks))))
+
+        return ((keymr, fetched.pop(keymr, None))
+                for keymr, _ in self.chain_index.blocks(chain_id, from_height))
+
+    def _fetch_entries(self, pointers, include_entry_context, encode_as_hex, prefetch,
+                       max_workers):
+        """
+        Fetch the entries for an iterable of (entry block, entry pointer)
+        tuples, in order.
+        """
+        def fetch(pointer):
+            block, entry_pointer = pointer
+            return self._entry_in_block(block, entry_pointer, include_entry_context,
+                                        encode_as_hex)
+
+        if prefetch > 0:
+            yield from utils.ordered_map(fetch, pointers, prefetch, max_workers)
+        else:
+            yield from map(fetch, pointers)
 
-        # Continuously pop off the stack and yield each entry one by one (in the
-        # order that they appear in the block)
-        while len(entry_blocks) > 0:
-            entry_block = entry_blocks.pop()
-            yield from self.entries_in_entry_block(entry_block, include_entry_context,
-                                                   encode_as_hex)
+    def _entry_in_block(self, block, entry_pointer, include_entry_context, encode_as_hex):
+        entry = self.entry(entry_pointer["entryhash"], encode_as_hex=encode_as_hex)
+        if include_entry_context:
+            entry["entryhash"] = entry_pointer["entryhash"]
+            entry["timestamp"] = entry_pointer["timestamp"]
+            entry["dbheight"] = block["header"]["dbheight"]
+        return entry
 
     def entries_at_height(
         self,
@@ -407,14 +870,8 @@ class Factomd(BaseAPI):
         A generator that yields all entries in a chain that occurred at the
         given height.
         """
-        # Look for the chain id in the directory block entries
-        target_chain_id = utils.hex_from_bytes_or_string(chain_id)
-        directory_block = self.directory_block_by_height(height)["dblock"]
-        for entry_block_pointer in directory_block["dbentries"]:
-            if entry_block_pointer["chainid"] == target_chain_id:
-                entry_block_keymr = entry_block_pointer["keymr"]
-                break
-        else:
+        entry_block_keymr = self._entry_block_keymr_at_height(chain_id, height)
+        if entry_block_keymr is None:
             return []  # Early return, chain didn't have entries in this block
 
         # Entry block found, yield all entries within the block
@@ -422,9 +879,158 @@ class Factomd(BaseAPI):
         yield from self.entries_in_entry_block(entry_block, include_entry_context,
                                                encode_as_hex)
 
+    def entries_at_height_for_chains(
+        self,
+        chain_ids: List[Union[bytes, str]],
+        height: int,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+        max_workers: int = None,
+    ):
+        """
+        Return the entries of many chains that occurred at the given height,
+        fetching the directory block only once.
+
+        Args:
+            prefetch (int): Number of entry blocks and entries to fetch ahead
+                in parallel. See `read_chain()`.
+            max_workers (int): Maximum number of requests in flight when
+                prefetching. Defaults to `prefetch`.
+
+        Returns:
+            dict: Lists of entries keyed by hex chain id, for each of the given
+                chains that had entries at this height.
+        """
+        index = self.directory_block_index(height)
+        chain_ids = {utils.hex_from_bytes_or_string(chain_id) for chain_id in chain_ids}
+        keymrs = [keymr for chain_id, keymr in index.items() if chain_id in chain_ids]
+        return self._entries_by_chain(keymrs, include_entry_context, encode_as_hex, prefetch,
+                                      max_workers)
+
+    def _entries_by_chain(self, keymrs, include_entry_context, encode_as_hex, prefetch,
+                          max_workers):
+        """
+        Fetch the entries of a list of entry blocks, grouped by chain id.
+        """
+        if prefetch > 0:
+            entry_blocks = utils.ordered_map(self.entry_block, keymrs, prefetch, max_workers)
+        else:
+            entry_blocks = map(self.entry_block, keymrs)
+        pointers = ((entry_block, entry_pointer)
+                    for entry_block in entry_blocks
+                    for entry_pointer in entry_block["entrylist"])
+
+        results = {}
+        for entry in self._fetch_entries(pointers, include_entry_context, encode_as_hex,
+                                         prefetch, max_workers):
+            results.setdefault(entry["chainid"], []).append(entry)
+        return results
+
+    def directory_block_index(self, height: int):
+        """
+        Return a dict mapping the hex ids of the chains with entries in the
+        directory block at the given height to the keymrs of their entry
+        blocks. Indexes are built once per directory block and kept in
+        `directory_block_index_cache`.
+        """
+        index = self.directory_block_index_cache.get(height)
+        if index is None:
+            directory_block = self.directory_block_by_height(height)["dblock"]
+            index = self._index_directory_block(directory_block)
+            self.directory_block_index_cache.set(height, index, self._index_size(index))
+        return index
+
+    @staticmethod
+    def _index_directory_block(directory_block: dict):
+        return {pointer["chainid"]: pointer["keymr"] for pointer in directory_block["dbentries"]}
+
+    @staticmethod
+    def _index_size(index: dict):
+        # Rough size of a dict of 64 character hex strings
+        return 100 + 250 * len(index)
+
+    def entry_blocks_in_range(
+        self,
+        chain_id: Union[bytes, str],
+        start_height: int,
+        end_height: int,
+        max_workers: int = 8,
+    ):
+        """
+        A generator that yields the (keymr, dbheight) pairs of a chain's entry
+        blocks between two directory block heights, inclusive, in chain order.
+
+        Unlike the walk along `prevkeymr` links done by `read_chain()`, this
+        scans the directory blocks over the range, which can be fetched in
+        parallel. It suits backfills over a known range of heights, especially
+        for chains with entries in many of the blocks in that range.
+
+        Args:
+            max_workers (int): Number of directory blocks to fetch in parallel.
+        """
+        def lookup(height):
+            return self._entry_block_keymr_at_height(chain_id, height), height
+
+        heights = range(start_height, end_height + 1)
+        for keymr, height in utils.ordered_map(lookup, heights, max_workers * 2, max_workers):
+            if keymr is not None:
+                yield keymr, height
+
+    def read_chain_range(
+        self,
+        chain_id: Union[bytes, str],
+        start_height: int,
+        end_height: int,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        max_workers: int = 8,
+        prefetch: int = 0,
+    ):
+        """
+        A generator that yields the entries of a chain recorded between two
+        directory block heights, inclusive, in chain order. The chain's entry
+        blocks are found with `entry_blocks_in_range()` and fetched in
+        parallel.
+
+        Args:
+            max_workers (int): Number of directory and entry blocks to fetch in
+                parallel.
+            prefetch (int): Number of entries to fetch ahead of the one being
+                yielded. See `read_chain()`.
+        """
+        keymrs = (keymr for keymr, _ in self.entry_blocks_in_range(
+            chain_id, start_height, end_height, max_workers))
+        entry_blocks = utils.ordered_map(self.entry_block, keymrs, max_workers * 2, max_workers)
+
+        def pointers():
+            for entry_block in entry_blocks:
+                for entry_pointer in entry_block["entrylist"]:
+                    yield entry_block, entry_pointer
+
+        yield from self._fetch_entries(pointers(), include_entry_context, encode_as_hex,
+                                       prefetch, max_workers)
+
+    def _entry_block_keymr_at_height(self, chain_id: Union[bytes, str], height: int):
+        """
+        Return the keymr of a chain's entry block in the directory block at
+        the given height, or None if the chain has no entries there.
+        """
+        index = self.directory_block_index(height)
+        return index.get(utils.hex_from_bytes_or_string(chain_id))
+
 
 class FactomWalletd(BaseAPI):
     host = "http://localhost:8089"
+    idempotent_methods = frozenset({
+        "address",
+        "all-addresses",
+        "get-height",
+        "properties",
+        "tmp-transactions",
+        "transactions",
+        "wallet-balances",
+    })
 
     def add_ec_output(self, name: str, amount: int, ec_address: str = None):
         return self._request("add-ec-output", {
@@ -467,6 +1073,52 @@ class FactomWalletd(BaseAPI):
         """
         return self._request("all-addresses")
 
+    def compose_chain(
+        self,
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+    ):
+        """
+        Build the signed commit and reveal messages creating a new chain with
+        the given first entry, without submitting them.
+
+        Returns:
+            dict: The "commit" and "reveal" JSON-RPC calls to send to factomd.
+        """
+        return self._request("compose-chain", {
+            "chain": {
+                "firstentry": {
+                    "extids": [utils.hex_from_bytes_or_string(x) for x in ext_ids],
+                    "content": utils.hex_from_bytes_or_string(content),
+                }
+            },
+            "ecpub": ec_address or self.ec_address,
+        })
+
+    def compose_entry(
+        self,
+        chain_id: Union[bytes, str],
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+    ):
+        """
+        Build the signed commit and reveal messages for a new entry, without
+        submitting them.
+
+        Returns:
+            dict: The "commit" and "reveal" JSON-RPC calls to send to factomd.
+        """
+        return self._request("compose-entry", {
+            "entry": {
+                "chainid": utils.hex_from_bytes_or_string(chain_id),
+                "extids": [utils.hex_from_bytes_or_string(x) for x in ext_ids],
+                "content": utils.hex_from_bytes_or_string(content),
+            },
+            "ecpub": ec_address or self.ec_address,
+        })
+
     def compose_transaction(self, name: str):
         return self._request("compose-transaction", {"tx-name": name})
 
@@ -629,18 +1281,7 @@ class FactomWalletd(BaseAPI):
         Returns:
             dict: API result from the final `reveal_chain()` call.
         """
-        calls = self._request(
-            "compose-chain",
-            {
-                "chain": {
-                    "firstentry": {
-                        "extids": [utils.hex_from_bytes_or_string(x) for x in ext_ids],
-                        "content": utils.hex_from_bytes_or_string(content),
-                    }
-                },
-                "ecpub": ec_address or self.ec_address,
-            },
-        )
+        calls = self.compose_chain(ext_ids, content, ec_address)
         factomd.commit_chain(calls["commit"]["params"]["message"])
         time.sleep(sleep)
         return factomd.reveal_chain(calls["reveal"]["params"]["entry"])
@@ -673,17 +1314,7 @@ class FactomWalletd(BaseAPI):
         Returns:
             dict: API result from the final `reveal_chain()` call.
         """
-        calls = self._request(
-            "compose-entry",
-            {
-                "entry": {
-                    "chainid": utils.hex_from_bytes_or_string(chain_id),
-                    "extids": [utils.hex_from_bytes_or_string(x) for x in ext_ids],
-                    "content": utils.hex_from_bytes_or_string(content),
-                },
-                "ecpub": ec_address or self.ec_address,
-            },
-        )
+        calls = self.compose_entry(chain_id, ext_ids, content, ec_address)
         factomd.commit_entry(calls["commit"]["params"]["message"])
         time.sleep(sleep)
         return factomd.reveal_entry(calls["reveal"]["params"]["entry"])
@@ -0,0 +1,182 @@
+import hashlib
+import struct
+import time
+from typing import List, Union
+
+import factom.utils as utils
+
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+except ImportError:  # pragma: no-cover
+    Ed25519PrivateKey = None
+
+
+_EC_PUBLIC_PREFIX = b"\x59\x2a"
+_EC_SECRET_PREFIX = b"\x5d\xb6"
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _sha256d(data: bytes):
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def _base58_encode(data: bytes):
+    n = int.from_bytes(data, "big")
+    chars = []
+    while n:
+        n, r = divmod(n, 58)
+        chars.append(_BASE58_ALPHABET[r])
+    leading = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading + "".join(reversed(chars))
+
+
+def _base58_decode(text: str):
+    n = 0
+    for c in text:
+        n = n * 58 + _BASE58_ALPHABET.index(c)
+    leading = len(text) - len(text.lstrip("1"))
+    return b"\x00" * leading + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+
+def encode_address(prefix: bytes, key: bytes):
+    body = prefix + key
+    return _base58_encode(body + _sha256d(body)[:4])
+
+
+def decode_address(address: str, prefix: bytes):
+    """
+    Return the 32 byte key of a human readable Factom address.
+
+    Raises:
+        ValueError: If the address is malformed or of the wrong type.
+    """
+    try:
+        data = _base58_decode(address)
+    except ValueError:
+        raise ValueError("Invalid address: {}".format(address))
+    if len(data) != 38 or data[:2] != prefix:
+        raise ValueError("Invalid address: {}".format(address))
+    if _sha256d(data[:34])[:4] != data[34:]:
+        raise ValueError("Invalid address checksum: {}".format(address))
+    return data[2:34]
+
+
+def _timestamp(timestamp: float = None):
+    # Commits carry a 6 byte timestamp in milliseconds
+    milliseconds = int((time.time() if timestamp is None else timestamp) * 1000)
+    return struct.pack(">Q", milliseconds)[2:]
+
+
+class EntryComposer:
+    """
+    Composes and signs the commit and reveal messages for new entries and
+    chains in-process, with an entry credit secret key, rather than asking
+    factom-walletd to. The messages are in the form returned by
+    `FactomWalletd.compose_entry()` and `compose_chain()`, and an instance can
+    be passed to `BulkSubmitter` in place of a wallet:
+
+        composer = EntryComposer("Es...")
+        calls = composer.compose_entry(chain_id, [b"id"], b"content")
+        factomd.commit_entry(calls["commit"]["params"]["message"])
+        factomd.reveal_entry(calls["reveal"]["params"]["entry"])
+
+    Requires the `cryptography` package: pip install factom-api[compose].
+
+    Args:
+        ec_secret (str): Entry credit secret key, as an "Es" address.
+    """
+    def __init__(self, ec_secret: str):
+        if Ed25519PrivateKey is None:
+            raise ImportError("Composing entries requires cryptography: "
+                              "pip install factom-api[compose]")
+        seed = decode_address(ec_secret, _EC_SECRET_PREFIX)
+        self._key = Ed25519PrivateKey.from_private_bytes(seed)
+        self.public_key = self._key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        self.ec_address = encode_address(_EC_PUBLIC_PREFIX, self.public_key)
+
+    def compose_entry(
+        self,
+        chain_id: Union[bytes, str],
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+        timestamp: float = None,
+    ):
+        """
+        Build the signed commit and reveal messages for a new entry.
+
+        Args:
+            chain_id (Union[bytes, str]): Chain ID where entry will be appended.
+            ext_ids (List[Union[bytes, str]]): A list of external IDs as
+                bytes-like objects or hex strings.
+            content (Union[bytes, str]): Entry content as a bytes like object or
+                hex string.
+            ec_address (str): Accepted for compatibility with
+                `FactomWalletd.compose_entry()`, and must be this composer's
+                address if given.
+            timestamp (float): Commit time in seconds since the epoch. Defaults
+                to now.
+
+        Returns:
+            dict: The "commit" and "reveal" JSON-RPC calls to send to factomd.
+        """
+        self._check_address(ec_address)
+        entry = utils.marshal_entry(chain_id, ext_ids, content)
+        message = b"".join([
+            b"\x00",
+            _timestamp(timestamp),
+            utils.entry_hash(entry),
+            bytes([utils.entry_cost(entry)]),
+        ])
+        return self._calls("commit-entry", self._sign(message), "reveal-entry", entry)
+
+    def compose_chain(
+        self,
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        ec_address: str = None,
+        timestamp: float = None,
+    ):
+        """
+        Build the signed commit and reveal messages creating a new chain with
+        the given first entry. The chain id is derived from `ext_ids`.
+
+        Returns:
+            dict: The "commit" and "reveal" JSON-RPC calls to send to factomd.
+        """
+        self._check_address(ec_address)
+        chain_id = utils.chain_id_from_ext_ids(ext_ids)
+        entry = utils.marshal_entry(chain_id, ext_ids, content)
+        entry_hash = utils.entry_hash(entry)
+        message = b"".join([
+            b"\x00",
+            _timestamp(timestamp),
+            _sha256d(chain_id),
+            _sha256d(entry_hash + chain_id),  # The weld
+            entry_hash,
+            bytes([utils.entry_cost(entry) + utils.CHAIN_COMMIT_COST]),
+        ])
+        return self._calls("commit-chain", self._sign(message), "reveal-chain", entry)
+
+    def _sign(self, message: bytes):
+        return message + self.public_key + self._key.sign(message)
+
+    def _check_address(self, ec_address: str):
+        if ec_address is not None and ec_address != self.ec_address:
+            raise ValueError("Can't pay with {}, composer holds the key of {}".format(
+                ec_address, self.ec_address))
+
+    @staticmethod
+    def _calls(commit_method: str, commit: bytes, reveal_method: str, entry: bytes):
+        return {
+            "commit": {"jsonrpc": "2.0", "id": 0, "method": commit_method,
+                       "params": {"message": commit.hex()}},
+            "reveal": {"jsonrpc": "2.0", "id": 0, "method": reveal_method,
+                       "params": {"entry": entry.hex()}},
+        }
+
+
+__all__ = ["EntryComposer", "decode_address", "encode_address"]
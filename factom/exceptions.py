@@ -1,4 +1,4 @@
-def handle_error_response(resp):
+def handle_error_response(resp, error=None):
     codes = {
         -1: FactomAPIError,
         -32008: BlockNotFound,
@@ -12,7 +12,8 @@ def handle_error_response(resp):
         -32700: ParseError,
     }
 
-    error = resp.json().get('error', {})
+    if error is None:
+        error = resp.json().get('error', {})
     message = error.get('message')
     code = error.get('code', -1)
     data = error.get('data', {})
@@ -75,3 +76,11 @@ class InternalError(FactomAPIError):
 
 class ParseError(FactomAPIError):
     pass
+
+
+class InsufficientEntryCredits(FactomAPIError):
+    """
+    Raised by `ECLedger` when an entry credit address can't pay for an entry,
+    before anything is sent to factomd.
+    """
+    message = "Insufficient entry credits"
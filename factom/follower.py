@@ -0,0 +1,199 @@
+import os
+import threading
+from typing import Callable, Iterable, Union
+
+import factom.utils as utils
+
+from .client import Factomd
+
+
+class FileCheckpoint:
+    """
+    Stores the last directory block height processed by a `ChainFollower` in a
+    file. The file is replaced atomically, so a crash never leaves a partially
+    written checkpoint behind.
+
+    Args:
+        path (str): Path to the checkpoint file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        """
+        Return the stored height, or None if nothing has been stored yet.
+        """
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip())
+        except FileNotFoundError:
+            return None
+
+    def save(self, height: int):
+        tmp_path = "{}.tmp".format(self.path)
+        with open(tmp_path, "w") as f:
+            f.write(str(height))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class ChainFollower:
+    """
+    Follows any number of chains by watching for new directory blocks, rather
+    than polling the head of every chain. Each new directory block is fetched
+    once and its entry blocks matched against the subscribed chain ids, so the
+    work done per block depends on the number of new entries, not on the
+    number of chains followed.
+
+    New entries are passed to the callbacks of the chains they belong to, and
+    can also be consumed by iterating over the follower:
+
+        follower = ChainFollower(factomd, [chain_id], checkpoint="follower.height")
+        for entry in follower:
+            ...
+
+    The height of the last fully processed directory block is saved to the
+    checkpoint, and following resumes after it on restart. A block is saved
+    only once all of its entries have been delivered, so entries of the block
+    being processed during a crash are delivered again.
+
+    Args:
+        factomd (Factomd): The client to poll.
+        chain_ids (iterable): Chain ids to subscribe to.
+        callback (callable): A function called with each new entry of any
+            subscribed chain.
+        checkpoint (Union[str, FileCheckpoint]): Where to persist the last
+            processed height, as a path or an object with `load()` and
+            `save(height)` methods.
+        start_height (int): Height of the first directory block to process if
+            there is no checkpoint. Defaults to the next block to be saved.
+        poll_interval (float): Seconds to wait between polls when there are no
+            new directory blocks.
+        include_entry_context (bool): Add the entry hash, timestamp and height
+            to each entry.
+        encode_as_hex (bool): Return content and external ids as hex strings
+            rather than bytes.
+        prefetch (int): Number of entry blocks and entries of each directory
+            block to fetch in parallel. See `Factomd.read_chain()`.
+    """
+    def __init__(
+        self,
+        factomd: Factomd,
+        chain_ids: Iterable[Union[bytes, str]] = (),
+        callback: Callable = None,
+        checkpoint: Union[str, FileCheckpoint] = None,
+        start_height: int = None,
+        poll_interval: float = 5.0,
+        include_entry_context: bool = False,
+        encode_as_hex: bool = False,
+        prefetch: int = 0,
+    ):
+        self.factomd = factomd
+        self.callback = callback
+        if isinstance(checkpoint, str):
+            checkpoint = FileCheckpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.poll_interval = poll_interval
+        self.include_entry_context = include_entry_context
+        self.encode_as_hex = encode_as_hex
+        self.prefetch = prefetch
+
+        self._callbacks = {}
+        for chain_id in chain_ids:
+            self.subscribe(chain_id)
+
+        self.height = None  # Last processed height
+        if checkpoint is not None:
+            self.height = checkpoint.load()
+        if self.height is None and start_height is not None:
+            self.height = start_height - 1
+
+        self._stop = threading.Event()
+
+    @property
+    def chain_ids(self):
+        return set(self._callbacks)
+
+    def subscribe(self, chain_id: Union[bytes, str], callback: Callable = None):
+        """
+        Follow a chain, optionally with a callback receiving only the entries
+        of that chain.
+        """
+        callbacks = self._callbacks.setdefault(utils.hex_from_bytes_or_string(chain_id), [])
+        if callback is not None:
+            callbacks.append(callback)
+
+    def unsubscribe(self, chain_id: Union[bytes, str]):
+        self._callbacks.pop(utils.hex_from_bytes_or_string(chain_id), None)
+
+    def poll(self):
+        """
+        Process all directory blocks saved since the last poll, calling the
+        callbacks for each new entry.
+
+        Returns:
+            list[dict]: The new entries, in order.
+        """
+        return list(self._poll())
+
+    def __iter__(self):
+        """
+        Yield new entries as they appear, until `stop()` is called.
+        """
+        self._stop.clear()
+        while not self._stop.is_set():
+            polled = False
+            for entry in self._poll():
+                polled = True
+                yield entry
+            if not polled:
+                self._stop.wait(self.poll_interval)
+
+    def run(self):
+        """
+        Follow the chains until `stop()` is called, delivering new entries to
+        the callbacks only.
+        """
+        for _ in self:
+            pass
+
+    def stop(self):
+        """
+        Stop following once the directory blocks of the current poll have been
+        processed.
+        """
+        self._stop.set()
+
+    def _poll(self):
+        heights = self.factomd.heights()
+        # Only directory blocks whose entries factomd already has can be read
+        latest = min(heights["directoryblockheight"], heights["entryheight"])
+        if self.height is None:
+            self.height = latest
+
+        while self.height < latest:
+            height = self.height + 1
+            yield from self._process(height)
+            self.height = height
+            if self.checkpoint is not None:
+                self.checkpoint.save(height)
+
+    def _process(self, height: int):
+        # Look up the directory block's chains among the subscriptions, rather
+        # than the other way around
+        index = self.factomd.directory_block_index(height)
+        keymrs = [keymr for chain_id, keymr in index.items() if chain_id in self._callbacks]
+        entries = self.factomd._entries_by_chain(keymrs, self.include_entry_context,
+                                                 self.encode_as_hex, self.prefetch, None)
+        for chain_id, chain_entries in entries.items():
+            callbacks = self._callbacks.get(chain_id, [])
+            for entry in chain_entries:
+                if self.callback is not None:
+                    self.callback(entry)
+                for callback in callbacks:
+                    callback(entry)
+                yield entry
+
+
+__all__ = ["ChainFollower", "FileCheckpoint"]
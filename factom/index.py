@@ -0,0 +1,129 @@
+import bisect
+import itertools
+import threading
+
+from .store import SQLiteDatabase
+
+
+class ChainIndex:
+    """
+    An in-memory index of the entry blocks making up each chain, in chain
+    order. A `Factomd` client given an index records the entry blocks it finds
+    while reading a chain, so later reads only need to walk back from the chain
+    head to the last block already indexed.
+
+    An index always holds a chain's entry blocks from its first block onwards.
+    """
+    def __init__(self):
+        self._keymrs = {}
+        self._heights = {}
+        self._indexed = {}  # The keymrs of each chain, as a set
+        self._lock = threading.Lock()
+
+    def tip(self, chain_id: str):
+        """
+        Return the keymr of the newest indexed entry block of a chain, or None
+        if the chain isn't indexed.
+        """
+        with self._lock:
+            keymrs = self._keymrs.get(chain_id)
+            return keymrs[-1] if keymrs else None
+
+    def extend(self, chain_id: str, blocks):
+        """
+        Append entry blocks to the end of a chain.
+
+        Args:
+            chain_id (str): The chain id, as a hex string.
+            blocks (list[tuple[str, int]]): (keymr, dbheight) pairs, oldest
+                first, following on from the current tip.
+        """
+        with self._lock:
+            keymrs = self._keymrs.setdefault(chain_id, [])
+            heights = self._heights.setdefault(chain_id, [])
+            indexed = self._indexed.setdefault(chain_id, set())
+            # Another thread may have indexed some of the same blocks since
+            # the tip was read, so skip any which are already there
+            for keymr, dbheight in blocks:
+                if keymr in indexed:
+                    continue
+                indexed.add(keymr)
+                keymrs.append(keymr)
+                heights.append(dbheight)
+
+    def blocks(self, chain_id: str, from_height: int = 0):
+        """
+        Iterate over the (keymr, dbheight) pairs of a chain's entry blocks at
+        or above `from_height`, oldest first.
+        """
+        keymrs = self._keymrs.get(chain_id, [])
+        heights = self._heights.get(chain_id, [])
+        start = bisect.bisect_left(heights, from_height)
+        return zip(itertools.islice(keymrs, start, None), itertools.islice(heights, start, None))
+
+    def remove(self, chain_id: str):
+        with self._lock:
+            self._keymrs.pop(chain_id, None)
+            self._heights.pop(chain_id, None)
+            self._indexed.pop(chain_id, None)
+
+
+class SQLiteChainIndex(SQLiteDatabase, ChainIndex):
+    """
+    A `ChainIndex` persisted to an SQLite database file, so it survives
+    restarts and may be shared by several processes. It may share a database
+    file with a `factom.store.BlockStore`.
+    """
+    schema = (
+        "CREATE TABLE IF NOT EXISTS entry_blocks ("
+        "chainid TEXT NOT NULL, seq INTEGER NOT NULL, keymr TEXT NOT NULL, "
+        "dbheight INTEGER NOT NULL, PRIMARY KEY (chainid, seq)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS entry_blocks_keymr ON entry_blocks (chainid, keymr)",
+    )
+
+    def tip(self, chain_id: str):
+        row = self._connection().execute(
+            "SELECT keymr FROM entry_blocks WHERE chainid = ? ORDER BY seq DESC LIMIT 1",
+            (chain_id,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def extend(self, chain_id: str, blocks):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have indexed some of the same blocks since
+            # the tip was read, so skip any which are already there
+            conn.executemany(
+                "INSERT INTO entry_blocks (chainid, seq, keymr, dbheight) "
+                "SELECT ?, (SELECT COALESCE(MAX(seq) + 1, 0) FROM entry_blocks WHERE chainid = ?), "
+                "?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM entry_blocks WHERE chainid = ? AND keymr = ?)",
+                ((chain_id, chain_id, keymr, dbheight, chain_id, keymr)
+                 for keymr, dbheight in blocks)
+            )
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def blocks(self, chain_id: str, from_height: int = 0, page_size: int = 1000):
+        # Read a page at a time so long chains aren't loaded into memory at
+        # once
+        seq = -1
+        while True:
+            rows = self._connection().execute(
+                "SELECT seq, keymr, dbheight FROM entry_blocks "
+                "WHERE chainid = ? AND seq > ? AND dbheight >= ? ORDER BY seq LIMIT ?",
+                (chain_id, seq, from_height, page_size)
+            ).fetchall()
+            for seq, keymr, dbheight in rows:
+                yield keymr, dbheight
+            if len(rows) < page_size:
+                return
+
+    def remove(self, chain_id: str):
+        self._connection().execute("DELETE FROM entry_blocks WHERE chainid = ?", (chain_id,))
+
+
+__all__ = ["ChainIndex", "SQLiteChainIndex"]
@@ -0,0 +1,194 @@
+import logging
+import threading
+from typing import Iterable, List, Union
+
+import requests
+
+import factom.utils as utils
+
+from .client import Factomd, FactomWalletd
+from .exceptions import FactomAPIError, InsufficientEntryCredits
+
+
+class _Account:
+    __slots__ = ("balance", "spent", "reserved", "topping_up")
+
+    def __init__(self):
+        self.balance = None  # Acknowledged balance at the last reconcile
+        self.spent = 0  # Committed since then
+        self.reserved = 0  # Being committed
+        self.topping_up = False
+
+    @property
+    def available(self):
+        return self.balance - self.spent - self.reserved
+
+
+class ECLedger:
+    """
+    Keeps track of the entry credits available to each entry credit address
+    locally, so that entries can be costed and paid for without asking
+    factomd for the balance each time.
+
+    Before an entry is committed, its cost is reserved, failing straight away
+    with `InsufficientEntryCredits` if the address can't cover it. Once the
+    commit succeeds the reservation is confirmed, or released if it fails:
+
+        cost = ledger.cost(ext_ids, content)
+        ledger.reserve(cost, ec_address)
+        try:
+            factomd.commit_entry(message)
+        except FactomAPIError:
+            ledger.release(cost, ec_address)
+            raise
+        ledger.confirm(cost, ec_address)
+
+    Balances are refreshed from factomd with `reconcile()`, which is meant to
+    be called once a block, and only otherwise when an address looks like it
+    can't pay. If a wallet is given, addresses falling below `top_up_threshold`
+    are topped up with `FactomWalletd.fct_to_ec()`.
+
+    Args:
+        factomd (Factomd): The client to query balances from.
+        walletd (FactomWalletd): The wallet to top up addresses with.
+        ec_addresses (iterable): Entry credit addresses to track. Others are
+            added as they are used.
+        top_up_threshold (int): Top up an address once its available balance
+            drops below this many entry credits.
+        top_up_amount (int): Number of entry credits to buy with each top up.
+        fct_address (str): Factoid address to buy entry credits with. If not
+            provided, `walletd.fct_address` will be used.
+    """
+    def __init__(
+        self,
+        factomd: Factomd,
+        walletd: FactomWalletd = None,
+        ec_addresses: Iterable[str] = (),
+        top_up_threshold: int = None,
+        top_up_amount: int = None,
+        fct_address: str = None,
+    ):
+        if top_up_threshold is not None and top_up_amount is None:
+            raise ValueError("top_up_threshold requires a top_up_amount")
+        self.factomd = factomd
+        self.walletd = walletd
+        self.top_up_threshold = top_up_threshold
+        self.top_up_amount = top_up_amount
+        self.fct_address = fct_address
+        self.height = None  # Block height at the last reconcile
+        self._accounts = {address: _Account() for address in ec_addresses}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cost(
+        ext_ids: List[Union[bytes, str]],
+        content: Union[bytes, str],
+        new_chain: bool = False,
+    ):
+        """
+        Return the number of entry credits it costs to write an entry, or to
+        create a chain with it as the first entry if `new_chain` is True.
+        """
+        cost = utils.entry_cost(utils.marshal_entry(bytes(32), ext_ids, content))
+        return cost + utils.CHAIN_COMMIT_COST if new_chain else cost
+
+    def available(self, ec_address: str = None):
+        """
+        Return the balance of an address less what has been spent or reserved
+        since the last reconcile.
+        """
+        ec_address = ec_address or self.factomd.ec_address
+        with self._lock:
+            account = self._accounts.setdefault(ec_address, _Account())
+            if account.balance is not None:
+                return account.available
+        self.reconcile(force=True)
+        with self._lock:
+            return self._accounts[ec_address].available
+
+    def reserve(self, cost: int, ec_address: str = None):
+        """
+        Set aside entry credits for an entry about to be committed.
+
+        Raises:
+            InsufficientEntryCredits: If the address can't cover `cost`, even
+                after reconciling with factomd.
+        """
+        ec_address = ec_address or self.factomd.ec_address
+        for reconciled in (False, True):
+            with self._lock:
+                account = self._accounts.setdefault(ec_address, _Account())
+                if account.balance is not None and account.available >= cost:
+                    account.reserved += cost
+                    break
+            if reconciled:
+                self._maybe_top_up(ec_address)
+                raise InsufficientEntryCredits("{} can't pay {} entry credits".format(
+                    ec_address, cost))
+            self.reconcile(force=True)
+        self._maybe_top_up(ec_address)
+
+    def confirm(self, cost: int, ec_address: str = None):
+        """
+        Mark reserved entry credits as spent, once the commit succeeded.
+        """
+        with self._lock:
+            account = self._accounts[ec_address or self.factomd.ec_address]
+            account.reserved -= cost
+            account.spent += cost
+
+    def release(self, cost: int, ec_address: str = None):
+        """
+        Return reserved entry credits, when the commit failed.
+        """
+        with self._lock:
+            self._accounts[ec_address or self.factomd.ec_address].reserved -= cost
+
+    def reconcile(self, height: int = None, force: bool = False):
+        """
+        Refresh the balances of all tracked addresses from factomd, in a single
+        call. Does nothing if `height` is given and balances were already
+        reconciled at that height, unless `force` is set. Without a `height`,
+        the height factomd reports is recorded instead.
+        """
+        if not force and height is not None and height == self.height:
+            return
+        with self._lock:
+            addresses = list(self._accounts)
+            # Commits confirmed from here on may not be counted in the reply
+            spent = {address: self._accounts[address].spent for address in addresses}
+        if not addresses:
+            return
+
+        result = self.factomd.multiple_entry_credit_balances(addresses)
+        with self._lock:
+            for address, balance in zip(addresses, result["balances"]):
+                if balance.get("err"):
+                    raise FactomAPIError("{}: {}".format(address, balance["err"]))
+                account = self._accounts[address]
+                account.balance = balance["ack"]
+                account.spent -= spent[address]
+                account.topping_up = False
+            # Keep the caller's height, so repeated calls with it are skipped
+            self.height = height if height is not None else result.get("currentheight")
+
+    def _maybe_top_up(self, ec_address: str):
+        if self.walletd is None or self.top_up_threshold is None:
+            return
+        with self._lock:
+            account = self._accounts[ec_address]
+            if account.topping_up or account.available >= self.top_up_threshold:
+                return
+            # Only once until the next reconcile shows the credits
+            account.topping_up = True
+
+        # A failed top up mustn't fail the reservation it follows
+        try:
+            rate = self.factomd.entry_credit_rate()["rate"]
+            self.walletd.fct_to_ec(self.factomd, self.top_up_amount * rate,
+                                   fct_address=self.fct_address, ec_address=ec_address)
+        except (FactomAPIError, requests.RequestException):
+            logging.exception("Failed to top up {}".format(ec_address))
+
+
+__all__ = ["ECLedger"]
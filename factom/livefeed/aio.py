@@ -0,0 +1,111 @@
+import asyncio
+import inspect
+import logging
+from concurrent.futures import Executor
+from typing import Callable
+
+from .listener import PROTOCOL_VERSION, _message_size
+
+
+class AsyncLiveFeedListener:
+    """
+    An asyncio LiveFeed listener which accepts connections from any number of
+    factomd nodes at once, and keeps accepting new connections as nodes come
+    and go.
+
+    Args:
+        handle (callable): A function or coroutine function receiving each
+            LiveFeed event as a bytes object. Events from a single connection
+            are handled in order.
+        host (str): The host to listen on.
+        port (int): The port on which LiveFeed is configured.
+        executor (concurrent.futures.Executor): If given, plain function
+            handlers are run in this executor so a slow handler doesn't block
+            the event loop. Otherwise they are called directly.
+    """
+    def __init__(
+        self,
+        handle: Callable,
+        host: str = "127.0.0.1",
+        port: int = 8040,
+        executor: Executor = None
+    ):
+        self.handle = handle
+        self.host = host
+        self.port = port
+        self.executor = executor
+        self.connections = set()
+        self._server = None
+
+    def run(self):
+        """
+        Listen until interrupted.
+        """
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        """
+        Listen until the task is cancelled or `close()` is called.
+        """
+        await self.start()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                if self._server.is_serving():
+                    raise
+
+    async def start(self):
+        """
+        Start listening in the background.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logging.debug("Listening for LiveFeed connections on {}".format(
+            ", ".join(str(s.getsockname()) for s in self._server.sockets)))
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    @property
+    def sockets(self):
+        return self._server.sockets if self._server is not None else ()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        address = writer.get_extra_info("peername")
+        logging.debug("Connected to LiveFeedAPI: {}".format(address))
+        self.connections.add(address)
+        try:
+            while True:
+                version = await reader.read(1)
+                if not version:
+                    break
+                writer.write(version)
+                await writer.drain()
+                if version[0] != PROTOCOL_VERSION:
+                    continue
+
+                size = _message_size.unpack(await reader.readexactly(_message_size.size))[0]
+                message = await reader.readexactly(size)
+                try:
+                    await self._dispatch(message)
+                except Exception:
+                    # Don't let one bad event drop the connection
+                    logging.exception("LiveFeed handler failed")
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            logging.warning("LiveFeed connection from {} closed mid-frame".format(address))
+        finally:
+            self.connections.discard(address)
+            writer.close()
+            logging.debug("Disconnected from LiveFeedAPI: {}".format(address))
+
+    async def _dispatch(self, message: bytes):
+        if self.executor is not None and not inspect.iscoroutinefunction(self.handle):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.handle, message)
+            return
+        result = self.handle(message)
+        if inspect.isawaitable(result):
+            await result
@@ -0,0 +1,222 @@
+import itertools
+import logging
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+OVERFLOW_SPILL = "spill"
+
+_spill_size = struct.Struct("<I")
+
+
+class _Shard:
+    """
+    A worker's queue of events: a bounded in-memory deque, plus an optional
+    spill file holding the events which didn't fit, in arrival order.
+    """
+    def __init__(self, spill_dir=None):
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.spill_dir = spill_dir
+        self.spill_file = None
+        self.spilled = 0
+        self._spill_read = 0
+        self._spill_write = 0
+
+    def spill(self, message: bytes):
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(dir=self.spill_dir)
+        self.spill_file.seek(self._spill_write)
+        self.spill_file.write(_spill_size.pack(len(message)))
+        self.spill_file.write(message)
+        self._spill_write = self.spill_file.tell()
+        self.spilled += 1
+
+    def unspill(self):
+        self.spill_file.seek(self._spill_read)
+        size = _spill_size.unpack(self.spill_file.read(_spill_size.size))[0]
+        message = self.spill_file.read(size)
+        self._spill_read = self.spill_file.tell()
+        self.spilled -= 1
+        if self.spilled == 0:
+            # Drained, start the file over
+            self.spill_file.truncate(0)
+            self._spill_read = self._spill_write = 0
+        return message
+
+
+class LiveFeedDispatcher:
+    """
+    Hands LiveFeed events off to a pool of worker threads through bounded
+    queues, so a slow handler doesn't hold up the socket and make factomd
+    buffer events. An instance is itself a handler, to be passed to a
+    `LiveFeedListener`:
+
+        dispatcher = LiveFeedDispatcher(write_to_db, workers=8, key=chain_id_of)
+        LiveFeedListener(dispatcher).run()
+
+    Each worker has its own queue. Events with the same key always go to the
+    same worker, so they are handled in the order they arrived. Without a key
+    function events are spread over the workers in turn, and may be handled
+    out of order.
+
+    Args:
+        handle (callable): A function receiving each event as a bytes object.
+        workers (int): Number of worker threads.
+        queue_size (int): Maximum number of events held in memory for each
+            worker.
+        overflow (str): What to do with an event when its worker's queue is
+            full. "block" waits for room, holding up the listener. "drop-oldest"
+            discards the oldest queued event. "spill" appends events to a
+            temporary file, to be handled in order once the queue drains.
+        key (callable): A function returning the ordering key of an event,
+            such as its chain id.
+        spill_dir (str): Directory for spill files. Defaults to the system
+            temporary directory.
+    """
+    def __init__(
+        self,
+        handle: Callable,
+        workers: int = 4,
+        queue_size: int = 1000,
+        overflow: str = OVERFLOW_BLOCK,
+        key: Callable = None,
+        spill_dir: str = None,
+    ):
+        if overflow not in (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL):
+            raise ValueError("Unknown overflow policy: {}".format(overflow))
+
+        self.handle = handle
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.key = key
+
+        self.dispatched = 0
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._stats_lock = threading.Lock()
+
+        self._closed = False
+        self._round_robin = itertools.cycle(range(workers))
+        self._shards = [_Shard(spill_dir) for _ in range(workers)]
+        self._threads = [
+            threading.Thread(target=self._work, args=(shard,), daemon=True,
+                             name="LiveFeedDispatcher-{}".format(i))
+            for i, shard in enumerate(self._shards)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __call__(self, message):
+        self.put(message)
+
+    def put(self, message):
+        """
+        Queue an event for handling, applying the overflow policy if its
+        worker's queue is full.
+        """
+        if self._closed:
+            raise RuntimeError("Dispatcher is closed")
+
+        # The listener reuses its buffer, so take a copy before queueing
+        message = bytes(message)
+        if self.key is not None:
+            shard = self._shards[hash(self.key(message)) % len(self._shards)]
+        else:
+            shard = self._shards[next(self._round_robin)]
+
+        with shard.condition:
+            if self.overflow == OVERFLOW_SPILL and (shard.spilled
+                                                    or len(shard.queue) >= self.queue_size):
+                # Once anything has spilled, later events follow it to disk to
+                # keep them in order
+                shard.spill(message)
+            else:
+                while len(shard.queue) >= self.queue_size:
+                    if self.overflow == OVERFLOW_DROP_OLDEST:
+                        shard.queue.popleft()
+                        with self._stats_lock:
+                            self.dropped += 1
+                    else:
+                        shard.condition.wait()
+                shard.queue.append(message)
+            shard.condition.notify_all()
+        with self._stats_lock:
+            self.dispatched += 1
+
+    def close(self, wait: bool = True):
+        """
+        Stop accepting events. Workers finish the events already queued, and
+        if `wait` is True this blocks until they have.
+        """
+        self._closed = True
+        for shard in self._shards:
+            with shard.condition:
+                shard.condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    @property
+    def queue_depth(self):
+        """
+        Number of events waiting to be handled, in memory and spilled to disk.
+        """
+        return sum(len(shard.queue) + shard.spilled for shard in self._shards)
+
+    @property
+    def stats(self):
+        """
+        A dict of counters describing the backlog and how long the handler
+        takes, in seconds.
+        """
+        with self._stats_lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "spilled": sum(shard.spilled for shard in self._shards),
+                "dispatched": self.dispatched,
+                "handled": self.handled,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "latency_mean": self.latency_total / self.handled if self.handled else 0.0,
+                "latency_max": self.latency_max,
+            }
+
+    def _work(self, shard: _Shard):
+        while True:
+            with shard.condition:
+                while not shard.queue and not shard.spilled and not self._closed:
+                    shard.condition.wait()
+                if shard.queue:
+                    message = shard.queue.popleft()
+                elif shard.spilled:
+                    message = shard.unspill()
+                else:
+                    return  # Closed and drained
+                shard.condition.notify_all()
+
+            start = time.perf_counter()
+            try:
+                self.handle(message)
+            except Exception:
+                logging.exception("LiveFeed handler failed")
+                with self._stats_lock:
+                    self.errors += 1
+            elapsed = time.perf_counter() - start
+
+            with self._stats_lock:
+                self.handled += 1
+                self.latency_total += elapsed
+                self.latency_max = max(self.latency_max, elapsed)
+
+
+__all__ = ["LiveFeedDispatcher", "OVERFLOW_BLOCK", "OVERFLOW_DROP_OLDEST", "OVERFLOW_SPILL"]
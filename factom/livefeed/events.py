@@ -0,0 +1,408 @@
+import logging
+from typing import Callable, Iterable, Union
+
+import factom.utils as utils
+
+
+# Wire types of the protobuf encoding
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+
+def _varint(data, pos: int):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _scan(data):
+    """
+    Yield the (field number, wire type, value) of each field of an encoded
+    protobuf message, without decoding nested messages. Length-delimited
+    values are yielded as memoryviews of `data`.
+    """
+    data = memoryview(data)
+    pos = 0
+    end = len(data)
+    while pos < end:
+        key, pos = _varint(data, pos)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == _VARINT:
+            value, pos = _varint(data, pos)
+        elif wire_type == _LENGTH_DELIMITED:
+            size, pos = _varint(data, pos)
+            if pos + size > end:
+                raise ValueError("Truncated protobuf field {}".format(number))
+            value = data[pos:pos + size]
+            pos += size
+        elif wire_type == _FIXED64:
+            value = int.from_bytes(data[pos:pos + 8], "little")
+            pos += 8
+        elif wire_type == _FIXED32:
+            value = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        else:
+            raise ValueError("Unsupported protobuf wire type {}".format(wire_type))
+        yield number, wire_type, value
+
+
+def _field(data, number: int):
+    for n, _, value in _scan(data):
+        if n == number:
+            return value
+    return None
+
+
+class _Message:
+    """
+    Base class for decoded LiveFeed messages. Subclasses map protobuf field
+    numbers to (attribute, kind, repeated), where kind is "uint", "bytes",
+    "string", "value" for the oneof binary/text wrappers of external ids and
+    content, or a `_Message` subclass. Unknown fields are skipped.
+    """
+    __slots__ = ()
+    _fields = {}
+
+    def __init__(self, data=b""):
+        for name, kind, repeated in self._fields.values():
+            setattr(self, name, [] if repeated else _DEFAULTS.get(kind))
+        for number, _, value in _scan(data):
+            try:
+                name, kind, repeated = self._fields[number]
+            except KeyError:
+                continue
+            value = _decode_value(kind, value)
+            if repeated:
+                getattr(self, name).append(value)
+            else:
+                setattr(self, name, value)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join(
+            "{}={!r}".format(name, getattr(self, name)) for name in self.__slots__))
+
+
+_DEFAULTS = {"uint": 0, "bytes": b"", "string": ""}
+
+
+def _decode_value(kind, value):
+    if kind == "uint":
+        return value
+    if kind == "bytes":
+        return bytes(value)
+    if kind == "string":
+        return str(value, "utf-8")
+    if kind == "value":
+        for number, _, wrapped in _scan(value):
+            return bytes(wrapped) if number == 1 else str(wrapped, "utf-8")
+        return b""
+    return kind(value)
+
+
+class Timestamp(_Message):
+    __slots__ = ("seconds", "nanos")
+    _fields = {1: ("seconds", "uint", False), 2: ("nanos", "uint", False)}
+
+
+class Entry(_Message):
+    __slots__ = ("hash", "external_ids", "content", "chain_id", "version")
+    _fields = {
+        1: ("hash", "bytes", False),
+        2: ("external_ids", "value", True),
+        3: ("content", "value", False),
+        4: ("chain_id", "bytes", False),
+        5: ("version", "uint", False),
+    }
+
+
+class ChainCommit(_Message):
+    __slots__ = ("entity_state", "chain_id_hash", "entry_hash", "weld", "timestamp", "credits",
+                 "ec_public_key", "version", "signature")
+    _fields = {
+        1: ("entity_state", "uint", False),
+        2: ("chain_id_hash", "bytes", False),
+        3: ("entry_hash", "bytes", False),
+        4: ("weld", "bytes", False),
+        5: ("timestamp", Timestamp, False),
+        6: ("credits", "uint", False),
+        7: ("ec_public_key", "bytes", False),
+        8: ("version", "uint", False),
+        9: ("signature", "bytes", False),
+    }
+
+
+class EntryCommit(_Message):
+    __slots__ = ("entity_state", "entry_hash", "timestamp", "credits", "ec_public_key", "version",
+                 "signature")
+    _fields = {
+        1: ("entity_state", "uint", False),
+        2: ("entry_hash", "bytes", False),
+        3: ("timestamp", Timestamp, False),
+        4: ("credits", "uint", False),
+        5: ("ec_public_key", "bytes", False),
+        6: ("version", "uint", False),
+        7: ("signature", "bytes", False),
+    }
+
+
+class EntryReveal(_Message):
+    __slots__ = ("entity_state", "entry", "timestamp")
+    _fields = {
+        1: ("entity_state", "uint", False),
+        2: ("entry", Entry, False),
+        3: ("timestamp", Timestamp, False),
+    }
+
+
+class StateChange(_Message):
+    __slots__ = ("entity_hash", "entity_state", "block_height")
+    _fields = {
+        1: ("entity_hash", "bytes", False),
+        2: ("entity_state", "uint", False),
+        3: ("block_height", "uint", False),
+    }
+
+
+class DirectoryBlockCommit(_Message):
+    """
+    The blocks of a directory block commit are kept encoded, as bytes.
+    """
+    __slots__ = ("directory_block", "admin_block", "factoid_block", "entry_credit_block",
+                 "entry_blocks", "entry_block_entries")
+    _fields = {
+        1: ("directory_block", "bytes", False),
+        2: ("admin_block", "bytes", False),
+        3: ("factoid_block", "bytes", False),
+        4: ("entry_credit_block", "bytes", False),
+        5: ("entry_blocks", "bytes", True),
+        6: ("entry_block_entries", "bytes", True),
+    }
+
+
+class NewBlockEvent(_Message):
+    __slots__ = ("new_block_height",)
+    _fields = {1: ("new_block_height", "uint", False)}
+
+
+class NewMinuteEvent(_Message):
+    __slots__ = ("new_minute", "block_height")
+    _fields = {1: ("new_minute", "uint", False), 2: ("block_height", "uint", False)}
+
+
+class ProcessListEvent(_Message):
+    __slots__ = ("new_block_event", "new_minute_event")
+    _fields = {
+        1: ("new_block_event", NewBlockEvent, False),
+        2: ("new_minute_event", NewMinuteEvent, False),
+    }
+
+
+class NodeMessage(_Message):
+    __slots__ = ("message_code", "level", "message_text")
+    _fields = {
+        1: ("message_code", "uint", False),
+        2: ("level", "uint", False),
+        3: ("message_text", "string", False),
+    }
+
+
+class DirectoryBlockAnchor(_Message):
+    __slots__ = ("directory_block_hash", "directory_block_merkle_root", "block_height",
+                 "timestamp", "btc_tx_hash", "btc_tx_offset", "btc_block_height",
+                 "btc_block_hash", "btc_confirmed", "ethereum_anchor_record_entry_hash",
+                 "ethereum_confirmed")
+    _fields = {
+        1: ("directory_block_hash", "bytes", False),
+        2: ("directory_block_merkle_root", "bytes", False),
+        3: ("block_height", "uint", False),
+        4: ("timestamp", Timestamp, False),
+        5: ("btc_tx_hash", "bytes", False),
+        6: ("btc_tx_offset", "uint", False),
+        7: ("btc_block_height", "uint", False),
+        8: ("btc_block_hash", "bytes", False),
+        9: ("btc_confirmed", "uint", False),
+        10: ("ethereum_anchor_record_entry_hash", "bytes", False),
+        11: ("ethereum_confirmed", "uint", False),
+    }
+
+
+CHAIN_COMMIT = "chain_commit"
+ENTRY_COMMIT = "entry_commit"
+ENTRY_REVEAL = "entry_reveal"
+STATE_CHANGE = "state_change"
+DIRECTORY_BLOCK_COMMIT = "directory_block_commit"
+PROCESS_LIST_EVENT = "process_list_event"
+NODE_MESSAGE = "node_message"
+DIRECTORY_BLOCK_ANCHOR = "directory_block_anchor"
+
+# Field numbers of the FactomEvent oneof, which identify the event type
+EVENT_TYPES = {
+    4: (CHAIN_COMMIT, ChainCommit),
+    5: (ENTRY_COMMIT, EntryCommit),
+    6: (ENTRY_REVEAL, EntryReveal),
+    7: (STATE_CHANGE, StateChange),
+    8: (DIRECTORY_BLOCK_COMMIT, DirectoryBlockCommit),
+    9: (PROCESS_LIST_EVENT, ProcessListEvent),
+    10: (NODE_MESSAGE, NodeMessage),
+    11: (DIRECTORY_BLOCK_ANCHOR, DirectoryBlockAnchor),
+}
+
+
+def peek_event(message):
+    """
+    Read the type of a protobuf encoded LiveFeed event, and the chain id of
+    entry reveals, without decoding the rest of it.
+
+    Returns:
+        tuple: The event type, one of the `EVENT_TYPES` names or None if it
+            isn't recognised, and the chain id as a hex string, or None.
+    """
+    for number, wire_type, value in _scan(message):
+        if number not in EVENT_TYPES or wire_type != _LENGTH_DELIMITED:
+            continue
+        event_type = EVENT_TYPES[number][0]
+        chain_id = None
+        if event_type == ENTRY_REVEAL:
+            entry = _field(value, 2)
+            if entry is not None:
+                chain_id = _field(entry, 4)
+                chain_id = chain_id.hex() if chain_id is not None else None
+        return event_type, chain_id
+    return None, None
+
+
+class LiveFeedEvent:
+    """
+    A protobuf encoded LiveFeed event. The type and chain id are read when the
+    event is created, and everything else only when first accessed.
+
+    Args:
+        message (bytes): The encoded event.
+    """
+    __slots__ = ("raw", "type", "chain_id", "_decoded", "_source", "_node_name",
+                 "_identity_chain_id", "_payload")
+
+    def __init__(self, message, event_type: str = None, chain_id: str = None):
+        self.raw = bytes(message)
+        if event_type is None:
+            event_type, chain_id = peek_event(self.raw)
+        self.type = event_type
+        self.chain_id = chain_id
+        self._decoded = False
+
+    @property
+    def source(self):
+        self._decode()
+        return self._source
+
+    @property
+    def node_name(self):
+        self._decode()
+        return self._node_name
+
+    @property
+    def identity_chain_id(self):
+        self._decode()
+        return self._identity_chain_id
+
+    @property
+    def payload(self):
+        """
+        The decoded event, e.g. an `EntryReveal`, or None for an unknown type.
+        """
+        self._decode()
+        return self._payload
+
+    def __repr__(self):
+        return "LiveFeedEvent(type={!r}, chain_id={!r})".format(self.type, self.chain_id)
+
+    def _decode(self):
+        if self._decoded:
+            return
+        self._source, self._node_name, self._identity_chain_id = 0, "", b""
+        self._payload = None
+        for number, _, value in _scan(self.raw):
+            if number == 1:
+                self._source = value
+            elif number == 2:
+                self._node_name = str(value, "utf-8")
+            elif number == 3:
+                self._identity_chain_id = bytes(value)
+            elif number in EVENT_TYPES:
+                self._payload = EVENT_TYPES[number][1](value)
+        self._decoded = True
+
+
+class LiveFeedRouter:
+    """
+    A LiveFeed handler which passes events to the subscribers interested in
+    them. Only the type and chain id of each event are read to route it, and
+    events no subscriber wants are dropped without being copied or decoded:
+
+        router = LiveFeedRouter()
+        router.subscribe(index_entry, types=[ENTRY_REVEAL], chain_ids=[chain_id])
+        LiveFeedListener(router).run()
+
+    Subscribers receive a `LiveFeedEvent`. Events must be protobuf encoded,
+    the default LiveFeed format of factomd.
+    """
+    def __init__(self):
+        self._subscriptions = []
+
+    def subscribe(
+        self,
+        callback: Callable,
+        types: Iterable[str] = None,
+        chain_ids: Iterable[Union[bytes, str]] = None,
+    ):
+        """
+        Pass events to `callback`, optionally only those of the given types
+        and, for entry reveals, chain ids. An event with no chain id never
+        matches a chain id filter.
+        """
+        types = frozenset(types) if types is not None else None
+        if chain_ids is not None:
+            chain_ids = frozenset(utils.hex_from_bytes_or_string(c) for c in chain_ids)
+        self._subscriptions.append((callback, types, chain_ids))
+
+    def unsubscribe(self, callback: Callable):
+        self._subscriptions = [s for s in self._subscriptions if s[0] != callback]
+
+    def __call__(self, message):
+        try:
+            event_type, chain_id = peek_event(message)
+        except (ValueError, IndexError):
+            logging.warning("Ignoring LiveFeed event which isn't valid protobuf")
+            return
+
+        event = None
+        for callback, types, chain_ids in self._subscriptions:
+            if types is not None and event_type not in types:
+                continue
+            if chain_ids is not None and chain_id not in chain_ids:
+                continue
+            if event is None:
+                event = LiveFeedEvent(message, event_type, chain_id)
+            callback(event)
+
+
+__all__ = [
+    "CHAIN_COMMIT",
+    "DIRECTORY_BLOCK_ANCHOR",
+    "DIRECTORY_BLOCK_COMMIT",
+    "ENTRY_COMMIT",
+    "ENTRY_REVEAL",
+    "LiveFeedEvent",
+    "LiveFeedRouter",
+    "NODE_MESSAGE",
+    "PROCESS_LIST_EVENT",
+    "STATE_CHANGE",
+    "peek_event",
+]
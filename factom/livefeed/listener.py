@@ -4,21 +4,101 @@ import struct
 from typing import Callable
 
 
+PROTOCOL_VERSION = 1
+
+_message_size = struct.Struct("<i")
+
+
+class FrameReader:
+    """
+    Reads LiveFeed frames from a connected socket. Each frame is a protocol
+    version byte, which is echoed back to factomd, followed for version 1 by a
+    little-endian 32-bit message size and the message itself.
+
+    Messages are received straight into a reusable buffer with `recv_into()`,
+    which grows as needed, and returned as a memoryview of it. The view is only
+    valid until the next call to `read_frame()`.
+
+    Args:
+        conn (socket.socket): The connection to read from.
+        buffer_size (int): Initial size of the receive buffer.
+    """
+    def __init__(self, conn: socket.socket, buffer_size: int = 64 * 1024):
+        self.conn = conn
+        self._buffer = memoryview(bytearray(buffer_size))
+        self._version = bytearray(1)
+        self._size = memoryview(bytearray(_message_size.size))
+
+    def read_frame(self):
+        """
+        Return the next message as a memoryview, or None once the connection
+        is closed between frames.
+
+        Raises:
+            ConnectionResetError: If the connection is closed part way through
+                a frame.
+        """
+        while True:
+            if self.conn.recv_into(self._version) == 0:
+                return None
+            self.conn.sendall(self._version)
+            if self._version[0] == PROTOCOL_VERSION:
+                break
+            logging.warning("Ignoring LiveFeed frame with unknown protocol version "
+                            "{}".format(self._version[0]))
+
+        self._recv_exactly(self._size)
+        size = _message_size.unpack(self._size)[0]
+        if size > len(self._buffer):
+            # Handlers may still hold a view of the old buffer, so it can't be
+            # resized in place
+            self._buffer = memoryview(bytearray(max(size, 2 * len(self._buffer))))
+        message = self._buffer[:size]
+        self._recv_exactly(message)
+        return message
+
+    def __iter__(self):
+        while True:
+            message = self.read_frame()
+            if message is None:
+                return
+            yield message
+
+    def _recv_exactly(self, view: memoryview):
+        received = 0
+        while received < len(view):
+            n = self.conn.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionResetError("LiveFeed connection closed mid-frame")
+            received += n
+
+
 class LiveFeedListener:
     """
     A simple class that listens to Factomd LiveFeed and performs a custom handle
     function on each event sent over the feed.
 
     Args:
-        handle (callable): A function receiving a bytes-like variable as its
-            only parameter. Handles all LiveFeed events.
+        handle (callable): A function receiving each LiveFeed event as its
+            only parameter. Events are passed as a memoryview of the receive
+            buffer, which is reused for the next event, so handlers which keep
+            an event around must copy it, e.g. with `bytes(event)`.
         host (str): The host of the LiveFeed to listen to.
         port (int): The port on which LiveFeed is configured.
+        as_bytes (bool): Pass each event to `handle` as a bytes object copied
+            out of the receive buffer instead.
     """
-    def __init__(self, handle: Callable, host: str = "127.0.0.1", port: int = 8040):
+    def __init__(
+        self,
+        handle: Callable,
+        host: str = "127.0.0.1",
+        port: int = 8040,
+        as_bytes: bool = False
+    ):
         self.handle = handle
         self.host = host
         self.port = port
+        self.as_bytes = as_bytes
 
     def run(self):
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -28,18 +108,5 @@ class LiveFeedListener:
             conn, address = s.accept()
             with conn:
                 logging.debug(f"Connected to LiveFeedAPI: {address}")
-                while True:
-                    protocol_version = conn.recv(1)
-                    if not protocol_version:
-                        break
-                    conn.sendall(protocol_version)
-                    if protocol_version[0] == 1:
-                        next_message_size_bytes = conn.recv(4)
-                        next_message_size = struct.unpack("<i", next_message_size_bytes)[0]
-                        if next_message_size is not None:
-                            message_data = conn.recv(next_message_size)
-                            remaining_bytes = next_message_size - len(message_data)
-                            while remaining_bytes > 0:
-                                message_data += conn.recv(remaining_bytes)
-                                remaining_bytes = next_message_size - len(message_data)
-                            self.handle(message_data)
+                for message in FrameReader(conn):
+                    self.handle(bytes(message) if self.as_bytes else message)
@@ -0,0 +1,169 @@
+import array
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Callable
+
+
+# Each record of a log is a header of the message size and the time it was
+# received, followed by the message
+_record_header = struct.Struct("<Id")
+
+
+class LiveFeedRecorder:
+    """
+    A LiveFeed handler which appends every event to a log file, to be replayed
+    later with `LiveFeedReplay`, before passing it on to another handler:
+
+        with LiveFeedRecorder("feed.log", handle=my_handler) as recorder:
+            LiveFeedListener(recorder).run()
+
+    Alongside the log, an index file "<path>.idx" holds the offset of each
+    record. Both files are only ever appended to, so recording can be resumed.
+
+    Args:
+        path (str): Path to the log file.
+        handle (callable): A handler to pass each event on to.
+    """
+    def __init__(self, path: str, handle: Callable = None):
+        self.path = path
+        self.handle = handle
+        self._log = open(path, "ab")
+        self._index = open(_index_path(path), "ab")
+
+    def __call__(self, message):
+        self._index.write(struct.pack("<Q", self._log.tell()))
+        self._log.write(_record_header.pack(len(message), time.time()))
+        self._log.write(message)
+        if self.handle is not None:
+            self.handle(message)
+
+    def flush(self):
+        self._log.flush()
+        self._index.flush()
+
+    def close(self):
+        self._log.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _index_path(path: str):
+    return "{}.idx".format(path)
+
+
+class LiveFeedReplay:
+    """
+    Replays a log written by `LiveFeedRecorder` into a handler, either as fast
+    as possible or at the pace the events were recorded. The log is memory
+    mapped, and events are passed as memoryviews of it, as `LiveFeedListener`
+    does, without being copied. Handlers which keep events beyond the call
+    should copy them with `bytes()`, or the log stays mapped after `close()`.
+
+        with LiveFeedReplay("feed.log", my_handler, speed=1.0) as replay:
+            replay.run()
+
+    If the index is missing it is rebuilt by scanning the log. A record cut
+    short by the recorder stopping part way through it is ignored.
+
+    Args:
+        path (str): Path to the log file.
+        handle (callable): The handler to feed events to.
+        speed (float): Replay at this multiple of the recorded pace, e.g. 1.0
+            for the original pace. Defaults to as fast as possible.
+    """
+    def __init__(self, path: str, handle: Callable = None, speed: float = None):
+        self.path = path
+        self.handle = handle
+        self.speed = speed
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._view = memoryview(self._mmap)
+        self._offsets = self._load_index()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, i: int):
+        """
+        Return the (timestamp, message) of the i-th record.
+        """
+        offset = self._offsets[i]
+        size, timestamp = _record_header.unpack_from(self._view, offset)
+        start = offset + _record_header.size
+        return timestamp, self._view[start:start + size]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def run(self, start: int = 0, stop: int = None):
+        """
+        Feed records `start` up to `stop` to the handler.
+
+        Returns:
+            int: The number of events replayed.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        started = None
+        for i in range(start, stop):
+            timestamp, message = self[i]
+            if self.speed is not None:
+                if started is None:
+                    started = (time.monotonic(), timestamp)
+                delay = started[0] + (timestamp - started[1]) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.handle(message)
+        return max(stop - start, 0)
+
+    def close(self):
+        try:
+            self._view.release()
+            if isinstance(self._mmap, mmap.mmap):
+                self._mmap.close()
+        except BufferError:
+            # The handler kept an event, which keeps the log mapped until it
+            # is garbage collected
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load_index(self):
+        offsets = array.array("Q")
+        try:
+            with open(_index_path(self.path), "rb") as f:
+                data = f.read()
+            offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+            if sys.byteorder == "big":
+                offsets.byteswap()
+        except FileNotFoundError:
+            offset = 0
+            while offset + _record_header.size <= len(self._view):
+                offsets.append(offset)
+                offset += _record_header.size + _record_header.unpack_from(self._view, offset)[0]
+
+        # Drop records that don't fit, from a recorder which was stopped mid-write
+        while offsets and self._record_end(offsets[-1]) > len(self._view):
+            offsets.pop()
+        return offsets
+
+    def _record_end(self, offset: int):
+        if offset + _record_header.size > len(self._view):
+            return offset + _record_header.size
+        return offset + _record_header.size + _record_header.unpack_from(self._view, offset)[0]
+
+
+__all__ = ["LiveFeedRecorder", "LiveFeedReplay"]
@@ -0,0 +1,234 @@
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+
+# The buffer starts with a header of the total number of bytes ever written,
+# the capacity of the ring, whether the writer has closed it and the position
+# the writer is writing up to. The ring of records follows, each a message size
+# and the message. A record never wraps around the end of the ring: the writer
+# skips to the start instead, leaving a marker if there's room for one.
+#
+# Like a seqlock, the writer publishes how far it is about to write before
+# overwriting anything, and the number of bytes written only after. A reader
+# checks the first against a record once it is done with it, to tell whether
+# the record was overwritten, even partly, while it was used.
+_header = struct.Struct("<QQQQ")
+_writing = struct.Struct("<Q")
+_WRITING_OFFSET = 24
+_HEADER_SIZE = 64
+_record_size = struct.Struct("<I")
+_WRAP = 0xFFFFFFFF
+
+
+class BufferOverrun(Exception):
+    """
+    Raised by a `SharedMemoryReader` that fell so far behind the writer that
+    events it had yet to read were overwritten.
+    """
+    def __init__(self, lost: int):
+        super().__init__("Reader fell behind, {} bytes of events were lost".format(lost))
+        self.lost = lost
+
+
+class SharedMemoryWriter:
+    """
+    A LiveFeed handler which writes every event to a ring buffer in shared
+    memory, so that any number of processes can consume the feed of a single
+    listener with `SharedMemoryReader`:
+
+        with SharedMemoryWriter("factom-livefeed") as writer:
+            LiveFeedListener(writer).run()
+
+    The writer never waits for readers. A reader that falls more than the size
+    of the buffer behind loses events, and is told so.
+
+    Args:
+        name (str): Name of the shared memory block, for readers to attach to.
+            A unique name is generated by default.
+        size (int): Size of the ring buffer in bytes. Defaults to 64MiB.
+    """
+    def __init__(self, name: str = None, size: int = 64 * 1024 * 1024):
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + size)
+        self._buffer = self._shm.buf
+        self.capacity = size
+        self.head = 0
+        _header.pack_into(self._buffer, 0, 0, size, 0, 0)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __call__(self, message):
+        size = _record_size.size + len(message)
+        if size > self.capacity:
+            raise ValueError("Event of {} bytes is larger than the buffer".format(len(message)))
+
+        offset = self.head % self.capacity
+        skip = self.capacity - offset if offset + size > self.capacity else 0
+        end = self.head + skip + size
+        # Warn readers off the records about to be overwritten first
+        _writing.pack_into(self._buffer, _WRITING_OFFSET, end)
+        if skip:
+            if skip >= _record_size.size:
+                _record_size.pack_into(self._buffer, _HEADER_SIZE + offset, _WRAP)
+            offset = 0
+
+        start = _HEADER_SIZE + offset
+        _record_size.pack_into(self._buffer, start, len(message))
+        self._buffer[start + _record_size.size:start + size] = message
+        # Publish the record only once it is fully written
+        self.head = end
+        _header.pack_into(self._buffer, 0, self.head, self.capacity, 0, end)
+
+    def close(self):
+        """
+        Mark the feed as finished and remove the shared memory block. Readers
+        already attached can still read the events they haven't yet.
+        """
+        _header.pack_into(self._buffer, 0, self.head, self.capacity, 1, self.head)
+        self._buffer = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _attach(name: str):
+    # Readers don't own the block, so it mustn't be removed when they exit
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedMemoryReader:
+    """
+    Reads the events written by a `SharedMemoryWriter`, in another process or
+    the same one. Each reader has its own position in the feed, and starts
+    after the newest event unless `from_start` is set.
+
+    Events are returned as memoryviews of the shared buffer, without being
+    copied. A view is only valid until the next read, and may be overwritten
+    by the writer if the reader is far enough behind, in which case the read
+    that follows raises `BufferOverrun`: the event was corrupted while it was
+    being used.
+
+    Args:
+        name (str): Name of the writer's shared memory block.
+        from_start (bool): Start with the first event ever written. If it has
+            already been overwritten, the first read raises `BufferOverrun`.
+        poll_interval (float): Longest time to sleep between checks for new
+            events.
+    """
+    def __init__(self, name: str, from_start: bool = False, poll_interval: float = 0.01):
+        self._shm = _attach(name)
+        self._buffer = self._shm.buf
+        self.poll_interval = poll_interval
+        head, self.capacity, _, _ = _header.unpack_from(self._buffer, 0)
+        self.cursor = 0 if from_start else head
+        self._view = None
+        self._record = None
+
+    @property
+    def lag(self):
+        """
+        Number of bytes of events written but not yet read.
+        """
+        return _header.unpack_from(self._buffer, 0)[0] - self.cursor
+
+    def read(self, timeout: float = None):
+        """
+        Return the next event as a memoryview, waiting up to `timeout` seconds
+        for one, or forever by default. Returns None if there's no event in
+        time, or the writer has closed and every event has been read.
+
+        Raises:
+            BufferOverrun: If events were lost, or the event returned by the
+                last read was overwritten while it was used. The reader skips
+                to the newest event, so the next read succeeds.
+        """
+        # Check the last event before letting go of it
+        self._check_overrun()
+        self._release()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0001
+        while True:
+            head, _, closed, _ = _header.unpack_from(self._buffer, 0)
+            self._check_overrun()
+            if self.cursor < head:
+                break
+            if closed or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, self.poll_interval)
+
+        offset = self.cursor % self.capacity
+        if self.capacity - offset < _record_size.size or \
+                _record_size.unpack_from(self._buffer, _HEADER_SIZE + offset)[0] == _WRAP:
+            self.cursor += self.capacity - offset
+            offset = 0
+        start = _HEADER_SIZE + offset + _record_size.size
+        size = _record_size.unpack_from(self._buffer, start - _record_size.size)[0]
+        self._view = self._buffer[start:start + size]
+        self._record = self.cursor
+        self.cursor += _record_size.size + size
+        # The writer may have overwritten the record while we read its size
+        self._check_overrun()
+        return self._view
+
+    def __iter__(self):
+        """
+        Yield events until the writer closes.
+        """
+        while True:
+            message = self.read()
+            if message is None:
+                return
+            yield message
+
+    def run(self, handle):
+        """
+        Pass every event to `handle` until the writer closes.
+        """
+        for message in self:
+            handle(message)
+
+    def close(self):
+        self._release()
+        self._buffer = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _check_overrun(self):
+        # A record is safe only while the writer, including what it is in the
+        # middle of writing, is less than a lap ahead of its start
+        oldest = self._record if self._record is not None else self.cursor
+        writing = _writing.unpack_from(self._buffer, _WRITING_OFFSET)[0]
+        if writing - oldest > self.capacity:
+            self._release()
+            self.cursor = _header.unpack_from(self._buffer, 0)[0]
+            raise BufferOverrun(writing - self.capacity - oldest)
+
+    def _release(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._record = None
+
+
+__all__ = ["BufferOverrun", "SharedMemoryReader", "SharedMemoryWriter"]
@@ -0,0 +1,183 @@
+import bisect
+import logging
+import threading
+from typing import Iterable
+
+
+# Upper bounds in seconds of the latency histogram buckets, as used by the
+# Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RPCEvent:
+    """
+    The outcome of one API call sent to the server, passed to the `hooks` of a
+    client. Calls answered from the cache aren't sent, and have no event.
+
+    Attributes:
+        method (str): The API method, or "batch" for a batch request.
+        duration (float): Seconds from sending the request to handling the
+            reply, including any retries.
+        request_bytes (int): Size of the JSON-RPC request.
+        response_bytes (int): Size of the reply, 0 if there was none.
+        status (int): HTTP status of the reply, None if there was none.
+        error_code (int): JSON-RPC error code, None if the call succeeded or
+            failed before getting a reply.
+        error (str): Name of the exception the call raised, None if it
+            succeeded.
+    """
+    __slots__ = ("method", "duration", "request_bytes", "response_bytes", "status",
+                 "error_code", "error")
+
+    def __init__(
+        self,
+        method: str,
+        duration: float,
+        request_bytes: int,
+        response_bytes: int = 0,
+        status: int = None,
+        error_code: int = None,
+        error: str = None,
+    ):
+        self.method = method
+        self.duration = duration
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.status = status
+        self.error_code = error_code
+        self.error = error
+
+    def __repr__(self):
+        return "RPCEvent({})".format(", ".join(
+            "{}={!r}".format(name, getattr(self, name)) for name in self.__slots__))
+
+
+def emit(hooks: Iterable, event: RPCEvent):
+    """
+    Pass an event to each hook. A failing hook is logged, and doesn't fail the
+    call or stop the other hooks.
+    """
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logging.exception("Metrics hook {!r} failed".format(hook))
+
+
+class _MethodStats:
+    __slots__ = ("calls", "errors", "buckets", "duration", "request_bytes", "response_bytes")
+
+    def __init__(self, size: int):
+        self.calls = 0
+        self.errors = {}
+        self.buckets = [0] * size  # Not cumulative, the last is +Inf
+        self.duration = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+class RPCMetrics:
+    """
+    A hook keeping per-method counts, latency histograms and sizes of API
+    calls, to be read with `as_dict()` or exported with `prometheus()`:
+
+        metrics = RPCMetrics()
+        factomd = Factomd(hooks=[metrics])
+        ...
+        metrics.as_dict()["entry"]["calls"]
+
+    Args:
+        buckets (iterable): Upper bounds in seconds of the latency histogram
+            buckets.
+    """
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RPCEvent):
+        i = bisect.bisect_left(self.buckets, event.duration)
+        with self._lock:
+            stats = self._methods.get(event.method)
+            if stats is None:
+                stats = self._methods[event.method] = _MethodStats(len(self.buckets) + 1)
+            stats.calls += 1
+            stats.buckets[i] += 1
+            stats.duration += event.duration
+            stats.request_bytes += event.request_bytes
+            stats.response_bytes += event.response_bytes
+            if event.error is not None:
+                label = event.error if event.error_code is None else str(event.error_code)
+                stats.errors[label] = stats.errors.get(label, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+    def as_dict(self):
+        """
+        Return the metrics of each method, keyed by method name. Errors are
+        counted by JSON-RPC error code, or by exception name for calls which
+        got no reply. Histogram buckets are cumulative, keyed by upper bound.
+        """
+        with self._lock:
+            return {
+                method: {
+                    "calls": stats.calls,
+                    "errors": dict(stats.errors),
+                    "duration": stats.duration,
+                    "buckets": self._cumulative(stats),
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                }
+                for method, stats in self._methods.items()
+            }
+
+    def prometheus(self, prefix: str = "factom_rpc"):
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        metrics = self.as_dict()
+        lines = [
+            "# HELP {}_duration_seconds Duration of API calls.".format(prefix),
+            "# TYPE {}_duration_seconds histogram".format(prefix),
+        ]
+        for method, stats in sorted(metrics.items()):
+            for bound, count in stats["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{}_duration_seconds_bucket{{method="{}",le="{}"}} {}'.format(
+                    prefix, method, le, count))
+            lines.append('{}_duration_seconds_sum{{method="{}"}} {!r}'.format(
+                prefix, method, stats["duration"]))
+            lines.append('{}_duration_seconds_count{{method="{}"}} {}'.format(
+                prefix, method, stats["calls"]))
+
+        lines += [
+            "# HELP {}_errors_total API calls which failed.".format(prefix),
+            "# TYPE {}_errors_total counter".format(prefix),
+        ]
+        for method, stats in sorted(metrics.items()):
+            for error, count in sorted(stats["errors"].items()):
+                lines.append('{}_errors_total{{method="{}",error="{}"}} {}'.format(
+                    prefix, method, error, count))
+
+        for name in ("request_bytes", "response_bytes"):
+            lines += [
+                "# HELP {}_{}_total Bytes sent or received by API calls.".format(prefix, name),
+                "# TYPE {}_{}_total counter".format(prefix, name),
+            ]
+            for method, stats in sorted(metrics.items()):
+                lines.append('{}_{}_total{{method="{}"}} {}'.format(
+                    prefix, name, method, stats[name]))
+        return "\n".join(lines) + "\n"
+
+    def _cumulative(self, stats: _MethodStats):
+        counts = {}
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), stats.buckets):
+            total += count
+            counts[bound] = total
+        return counts
+
+
+__all__ = ["DEFAULT_BUCKETS", "RPCEvent", "RPCMetrics", "emit"]
@@ -0,0 +1,276 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+
+class Node:
+    """
+    A server in a `NodePool`, with the state used to route requests to it.
+    """
+    __slots__ = ("host", "outstanding", "failures", "ejected_until", "height", "behind")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.outstanding = 0
+        self.failures = 0  # Consecutive
+        self.ejected_until = 0.0
+        self.height = None
+        self.behind = False
+
+    def __repr__(self):
+        return "Node({!r})".format(self.host)
+
+
+class NodePool:
+    """
+    Spreads requests over several servers running the same API. Reads go to
+    the healthy node with the fewest requests in flight, and writes to the
+    preferred node while it is healthy.
+
+    Nodes are checked passively: one that fails `max_failures` requests in a
+    row is ejected for `ejection_time` seconds. Nodes whose block height lags
+    the highest in the pool by more than `max_lag` blocks, as reported by
+    `update_heights()`, are also left out until they catch up. If no node is
+    healthy, requests go to all of them rather than none.
+
+    Args:
+        hosts (list[str]): Hostnames, including http(s)://, of the nodes.
+        preferred (str): The node to send writes to. Defaults to the first.
+        max_failures (int): Consecutive failures after which a node is
+            ejected.
+        ejection_time (float): Seconds an ejected node is left out for.
+        max_lag (int): Number of blocks a node may be behind the others.
+        check_interval (float): Seconds between checks of the nodes' heights,
+            or None to only check them when asked.
+        check_timeout (float): Timeout in seconds for each node to answer a
+            check, after which its height is unknown.
+    """
+    def __init__(
+        self,
+        hosts: List[str],
+        preferred: str = None,
+        max_failures: int = 3,
+        ejection_time: float = 30.0,
+        max_lag: int = 1,
+        check_interval: float = 30.0,
+        check_timeout: float = 2.0,
+    ):
+        if not hosts:
+            raise ValueError("A node pool needs at least one host")
+        self.nodes = [Node(host) for host in hosts]
+        self.preferred = self.nodes[hosts.index(preferred) if preferred else 0]
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+
+    def healthy(self, node: Node, now: float = None):
+        now = time.monotonic() if now is None else now
+        return node.ejected_until <= now and not node.behind
+
+    def acquire(self, write: bool = False, exclude=()):
+        """
+        Choose a node for a request and count the request as in flight on it.
+        Every call must be followed by a `release()`.
+
+        Args:
+            write (bool): Prefer the preferred node.
+            exclude (iterable): Nodes not to choose, such as ones which just
+                failed this request, unless there are no others.
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [n for n in self.nodes if n not in exclude] or self.nodes
+            healthy = [n for n in candidates if self.healthy(n, now)] or candidates
+            if write and self.preferred in healthy:
+                node = self.preferred
+            else:
+                fewest = min(n.outstanding for n in healthy)
+                node = random.choice([n for n in healthy if n.outstanding == fewest])
+            node.outstanding += 1
+            return node
+
+    def release(self, node: Node, failed: bool = False):
+        """
+        Record the end of a request, and whether the node failed to serve it.
+        """
+        with self._lock:
+            node.outstanding -= 1
+            if not failed:
+                node.failures = 0
+                return
+            node.failures += 1
+            if node.failures >= self.max_failures:
+                node.ejected_until = time.monotonic() + self.ejection_time
+                node.failures = 0
+
+    def check_due(self):
+        """
+        Return True, once per `check_interval`, when the nodes' heights should
+        be checked again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.check_interval is None or now - self._last_check < self.check_interval:
+                return False
+            self._last_check = now
+            return True
+
+    def update_heights(self, heights: dict):
+        """
+        Record the block height of each node, given as a dict of `Node` to
+        height, or None for a node which couldn't be reached, and mark the
+        nodes lagging the rest.
+        """
+        with self._lock:
+            for node, height in heights.items():
+                node.height = height
+            known = [n.height for n in self.nodes if n.height is not None]
+            top = max(known) if known else None
+            for node in self.nodes:
+                node.behind = top is not None and (
+                    node.height is None or top - node.height > self.max_lag)
+
+    @property
+    def stats(self):
+        """
+        A dict of the state of each node, keyed by host.
+        """
+        now = time.monotonic()
+        return {
+            n.host: {
+                "outstanding": n.outstanding,
+                "height": n.height,
+                "behind": n.behind,
+                "ejected": n.ejected_until > now,
+            }
+            for n in self.nodes
+        }
+
+
+class HedgingPolicy:
+    """
+    Cuts the tail latency of reads on a client with several nodes. When the
+    node a read went to hasn't replied within the given percentile of recent
+    latencies, the read is also sent to another node, and whichever replies
+    first is used. Hedging at the 95th percentile sends about 5% more reads.
+
+    The latencies are those of the client's own reads, and the hedged reads
+    are sent from a thread pool owned by the policy. The wait only starts once
+    a read is sent, not while it is queued for a thread, and reads aren't
+    hedged while every thread is busy. A read which lost can't be interrupted
+    once sent, so its reply is discarded when it arrives.
+
+    Args:
+        percentile (float): Percentile of recent latencies to wait for before
+            hedging.
+        min_delay (float): Lower bound in seconds on the wait, so that a run of
+            fast replies doesn't make every read hedge.
+        initial_delay (float): Seconds to wait until enough latencies have been
+            seen to take a percentile.
+        window (int): Number of recent latencies to keep.
+        max_workers (int): Maximum number of reads in flight through the
+            policy.
+    """
+    # Latencies recorded between computing the delay, the first time included
+    _refresh_every = 50
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.005,
+        initial_delay: float = 0.1,
+        window: int = 1000,
+        max_workers: int = 32,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.max_workers = max_workers
+        self.requests = 0
+        self.hedged = 0
+        self._latencies = deque(maxlen=window)
+        self._delay = initial_delay
+        self._unsorted = 0
+        self._running = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """
+        Record the time in seconds a node took to reply.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            self._unsorted += 1
+            if self._unsorted < self._refresh_every:
+                return
+            # Sorting the window every read would cost more than it saves
+            latencies = sorted(self._latencies)
+            i = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+            self._delay = max(latencies[i], self.min_delay)
+            self._unsorted = 0
+
+    @property
+    def delay(self):
+        """
+        Seconds to wait for the first node before hedging.
+        """
+        return self._delay
+
+    def count(self, hedged: bool = False):
+        """
+        Count a read sent through the policy, or one of them being hedged.
+        """
+        with self._lock:
+            if hedged:
+                self.hedged += 1
+            else:
+                self.requests += 1
+
+    def submit(self, func, *args):
+        """
+        Call `func(*args)` on the policy's thread pool. Returns the future and
+        an event set once the call has started, rather than waiting for a
+        free thread.
+        """
+        started = threading.Event()
+
+        def run():
+            with self._lock:
+                self._running += 1
+            started.set()
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor.submit(run), started
+
+    @property
+    def saturated(self):
+        """
+        True when every thread is busy, so that a hedge would only queue.
+        """
+        with self._lock:
+            return self._running >= self.max_workers
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "hedged": self.hedged, "delay": self._delay}
+
+
+__all__ = ["HedgingPolicy", "Node", "NodePool"]
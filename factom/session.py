@@ -1,13 +1,50 @@
+import time
 from base64 import b64encode
+from http.cookiejar import DefaultCookiePolicy
 
 from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+import factom.utils as utils
+
+
+# Responses from a proxy in front of the API which are worth retrying
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
 
 
 class FactomAPISession(Session):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        pool_size=10,
+        pool_block=False,
+        timeout=None,
+        retries=0,
+        backoff=0.1,
+        max_backoff=5.0,
+        **kwargs
+    ):
         """
-        Creates a new CoreAPISession instance.
+        Creates a new CoreAPISession instance. A session may be shared by
+        threads, which reuse connections from its pool.
+
+        Args:
+            pool_size (int): Maximum number of connections kept open to each
+                host.
+            pool_block (bool): When all `pool_size` connections to a host are
+                in use, wait for one to be free rather than opening another
+                which is closed after use. Setting this avoids churning
+                through connections under load.
+            timeout (Union[float, tuple]): Timeout in seconds for requests, or
+                a (connect timeout, read timeout) tuple. No timeout by default.
+            retries (int): Number of times to retry a request made with
+                `retry=True` which fails to connect, times out or gets a
+                502, 503 or 504 response.
+            backoff (float): Seconds to wait before the first retry. The wait
+                doubles with each retry, up to `max_backoff`, and is jittered.
+            max_backoff (float): Longest wait between retries.
         """
         super(FactomAPISession, self).__init__(*args, **kwargs)
 
@@ -16,6 +53,18 @@ class FactomAPISession(Session):
             'Content-Type': 'text/plain',
         })
 
+        adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=pool_block)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        # The APIs don't use cookies, and a cookie jar updated by several
+        # threads at once isn't safe
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
     def init_basic_auth(self, username, password):
         credentials = b64encode('{}:{}'.format(username, password).encode())
         self.headers.update({
@@ -25,5 +74,27 @@ class FactomAPISession(Session):
     def init_tls(self, certfile):
         self.verify = certfile
 
+    def request(self, method, url, *args, retry=False, **kwargs):
+        """
+        Send a request, with the session's timeout unless one is given. Only
+        requests made with `retry=True` are retried, which must be safe to
+        repeat.
+        """
+        if len(args) < 7:
+            # Unless given positionally, after params through to auth
+            kwargs.setdefault('timeout', self.timeout)
+        attempts = self.retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                resp = super(FactomAPISession, self).request(method, url, *args, **kwargs)
+            except (ConnectionError, Timeout):
+                if last:
+                    raise
+            else:
+                if last or resp.status_code not in RETRY_STATUS_CODES:
+                    return resp
+            time.sleep(utils.backoff_delay(attempt, self.backoff, self.max_backoff))
+
 
 __all__ = ['FactomAPISession']
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import threading
+
+from .cache import BaseCache
+
+
+class SQLiteDatabase:
+    """
+    Base class for objects persisted in an SQLite database file which may be
+    shared by several threads and processes. The database runs in WAL mode, so
+    readers aren't blocked while another process writes.
+
+    Args:
+        path (str): Path to the database file. It is created if it doesn't
+            already exist.
+        timeout (float): Seconds to wait for a lock held by another writer
+            before giving up.
+    """
+    schema = ()
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        for statement in self.schema:
+            self._connection().execute(statement)
+
+    def _connection(self):
+        # sqlite3 connections can't be shared between threads, nor inherited
+        # across a fork, so keep one per thread and process.
+        pid, conn = getattr(self._local, "connection", (None, None))
+        if pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = (os.getpid(), conn)
+        return conn
+
+    def close(self):
+        """
+        Close this thread's connection to the database.
+        """
+        pid, conn = getattr(self._local, "connection", (None, None))
+        if pid == os.getpid():
+            conn.close()
+        self._local.connection = (None, None)
+
+
+class BlockStore(SQLiteDatabase, BaseCache):
+    """
+    A persistent store for immutable API results such as entries and blocks,
+    backed by an SQLite database file. It implements the same interface as the
+    in-memory caches, and is passed to a client as its `store`:
+
+        factomd = Factomd(cache=LRUCache(), store=BlockStore("/var/lib/factom.db"))
+
+    Any number of processes on the same host may read from the store while
+    another writes, each thread and process opening its own connection. Values
+    are returned as the bytes stored, ready to be parsed without further
+    decoding.
+    """
+    schema = (
+        "CREATE TABLE IF NOT EXISTS objects (key TEXT PRIMARY KEY, value BLOB NOT NULL) "
+        "WITHOUT ROWID",
+    )
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def __contains__(self, key):
+        return self._connection().execute(
+            "SELECT 1 FROM objects WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, key: str):
+        row = self._connection().execute(
+            "SELECT value FROM objects WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: bytes):
+        # Stored objects never change, so an existing row is left alone
+        self._connection().execute(
+            "INSERT OR IGNORE INTO objects (key, value) VALUES (?, ?)", (key, value))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM objects")
+
+
+__all__ = ["BlockStore", "SQLiteDatabase"]
@@ -0,0 +1,153 @@
+import time
+from typing import Iterable
+
+import requests
+
+import factom.utils as utils
+
+from .client import Factomd, FactomWalletd
+from .exceptions import FactomAPIError, InternalError, RepeatedCommit
+from .ledger import ECLedger
+from .session import RETRY_STATUS_CODES
+
+
+class BulkSubmitter:
+    """
+    Submits many entries and chains at once. Each entry is composed, committed
+    and revealed on a pool of threads, so the round trips for different
+    entries overlap rather than running one after another.
+
+    Instead of sleeping for a fixed time between commit and reveal, the reveal
+    is sent straight away. Commits and reveals which fail to arrive, time out
+    or get an internal or gateway error are retried with backoff, while other
+    errors, such as invalid params, fail the entry straight away. factomd
+    rejecting a retried commit as a `RepeatedCommit` is taken to mean an
+    earlier attempt got through, so no entry is paid for twice.
+
+        submitter = BulkSubmitter(factomd, walletd)
+        entries = ({"chain_id": chain_id, "ext_ids": [b"id"], "content": c} for c in contents)
+        for result in submitter.submit(entries):
+            if result["error"] is not None:
+                ...
+
+    Entries which are malformed or too large fail with ValueError, without
+    stopping the others.
+
+    Args:
+        factomd (Factomd): The client to submit commits and reveals to.
+        walletd (FactomWalletd): The wallet to compose and sign them with, or
+            an `EntryComposer` to do so locally.
+        ec_address (str): Entry credit address to pay with. If not provided,
+            `walletd.ec_address` will be used.
+        max_workers (int): Number of entries being submitted at once.
+        retries (int): Number of times to retry a failed commit or reveal.
+        backoff (float): Seconds to wait before the first retry. The wait
+            doubles with each retry, up to `max_backoff`, and is jittered.
+        max_backoff (float): Longest wait between retries.
+        ledger (ECLedger): If given, the cost of each entry is reserved in the
+            ledger before it is composed, and entries the address can't pay
+            for fail with `InsufficientEntryCredits` without being sent.
+    """
+    def __init__(
+        self,
+        factomd: Factomd,
+        walletd: FactomWalletd,
+        ec_address: str = None,
+        max_workers: int = 16,
+        retries: int = 5,
+        backoff: float = 0.1,
+        max_backoff: float = 5.0,
+        ledger: ECLedger = None,
+    ):
+        self.factomd = factomd
+        self.walletd = walletd
+        self.ec_address = ec_address
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.ledger = ledger
+
+    def submit(self, entries: Iterable[dict]):
+        """
+        Submit entries, each a dict of "ext_ids", "content" and the "chain_id"
+        to add it to. An entry without a "chain_id" creates a new chain.
+
+        Returns:
+            generator: A result for each entry, in the same order, as a dict of
+                the "entry", the "reveal" API result or None if it failed, the
+                "error" it failed with, and whether its commit had already been
+                made ("repeated_commit").
+        """
+        return utils.ordered_map(self._submit, entries, 2 * self.max_workers, self.max_workers)
+
+    def _submit(self, entry: dict):
+        result = {"entry": entry, "reveal": None, "error": None, "repeated_commit": False}
+        chain_id = entry.get("chain_id")
+        ec_address = self.ec_address or self.walletd.ec_address
+        cost = None
+        try:
+            # Bad entries fail on their own rather than ending the submission
+            new_cost = _cost(entry)
+            if self.ledger is not None:
+                self.ledger.reserve(new_cost, ec_address)
+                cost = new_cost
+
+            if chain_id is None:
+                calls = self.walletd.compose_chain(entry["ext_ids"], entry["content"],
+                                                   self.ec_address)
+                commit, reveal = self.factomd.commit_chain, self.factomd.reveal_chain
+            else:
+                calls = self.walletd.compose_entry(chain_id, entry["ext_ids"], entry["content"],
+                                                   self.ec_address)
+                commit, reveal = self.factomd.commit_entry, self.factomd.reveal_entry
+
+            try:
+                self._retry(commit, calls["commit"]["params"]["message"])
+            except RepeatedCommit:
+                # Made by an earlier attempt which timed out, or before this
+                # submission. Either way it's paid for, so go on to the reveal
+                result["repeated_commit"] = True
+            if cost is not None:
+                self.ledger.confirm(cost, ec_address)
+                cost = None
+            result["reveal"] = self._retry(reveal, calls["reveal"]["params"]["entry"])
+        except (FactomAPIError, requests.RequestException, ValueError) as e:
+            result["error"] = e
+        finally:
+            if cost is not None:
+                # Reserved but never committed
+                self.ledger.release(cost, ec_address)
+        return result
+
+    def _retry(self, func, arg):
+        for attempt in range(self.retries + 1):
+            try:
+                return func(arg)
+            except (FactomAPIError, requests.RequestException) as e:
+                if attempt == self.retries or not _transient(e):
+                    raise
+            time.sleep(utils.backoff_delay(attempt, self.backoff, self.max_backoff))
+
+
+def _cost(entry: dict):
+    # The cost of an entry, raising ValueError if it's malformed or too large
+    try:
+        ext_ids, content = entry["ext_ids"], entry["content"]
+        chain_id = entry.get("chain_id")
+        marshalled = utils.marshal_entry(chain_id or bytes(32), ext_ids, content)
+    except (KeyError, TypeError) as e:
+        raise ValueError("Malformed entry: {!r}".format(e))
+    cost = utils.entry_cost(marshalled)
+    return cost + utils.CHAIN_COMMIT_COST if chain_id is None else cost
+
+
+def _transient(error):
+    # Failures worth retrying, as opposed to requests factomd will never accept
+    if isinstance(error, (InternalError, requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in RETRY_STATUS_CODES
+
+
+__all__ = ["BulkSubmitter"]
@@ -1,5 +1,207 @@
-from typing import Union
+import hashlib
+import random
+import struct
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Union
+
+
+# An entry is a version byte, the chain id and the size of the external ids,
+# followed by the external ids, each prefixed with its size, and the content
+ENTRY_HEADER_SIZE = 35
+MAX_ENTRY_SIZE = 10240
+
+# Creating a chain costs this many entry credits on top of its first entry
+CHAIN_COMMIT_COST = 10
 
 
 def hex_from_bytes_or_string(x: Union[bytes, str]):
     return x if type(x) is str else x.hex()
+
+
+def bytes_from_bytes_or_string(x: Union[bytes, str]):
+    return bytes.fromhex(x) if type(x) is str else bytes(x)
+
+
+def backoff_delay(attempt: int, backoff: float, max_backoff: float):
+    """
+    Return how long to wait before retry number `attempt`, counting from 0: an
+    exponentially growing delay capped at `max_backoff`, with jitter so that
+    clients retrying together spread out.
+    """
+    return min(backoff * 2 ** attempt, max_backoff) * random.uniform(0.5, 1.0)
+
+
+def marshal_entry(
+    chain_id: Union[bytes, str],
+    ext_ids: List[Union[bytes, str]],
+    content: Union[bytes, str],
+):
+    """
+    Return the binary form of an entry, as revealed to factomd.
+
+    Raises:
+        ValueError: If the entry is larger than the 10KiB factomd accepts.
+    """
+    ext_ids = [bytes_from_bytes_or_string(x) for x in ext_ids]
+    parts = [b"\x00", bytes_from_bytes_or_string(chain_id), b""]
+    for ext_id in ext_ids:
+        parts.append(struct.pack(">H", len(ext_id)))
+        parts.append(ext_id)
+    parts[2] = struct.pack(">H", sum(len(x) + 2 for x in ext_ids))
+    parts.append(bytes_from_bytes_or_string(content))
+    entry = b"".join(parts)
+    if len(entry) - ENTRY_HEADER_SIZE > MAX_ENTRY_SIZE:
+        raise ValueError("Entry is larger than {} bytes".format(MAX_ENTRY_SIZE))
+    return entry
+
+
+def entry_hash(entry: bytes):
+    """
+    Return the hash of a binary entry, the SHA-256 of its SHA-512 followed by
+    the entry itself. `entry` may be any bytes-like object.
+    """
+    h = hashlib.sha256(hashlib.sha512(entry).digest())
+    h.update(entry)
+    return h.digest()
+
+
+def chain_id_from_ext_ids(ext_ids: List[Union[bytes, str]]):
+    """
+    Return the id of the chain whose first entry has the given external ids,
+    as bytes-like objects or hex strings.
+    """
+    h = hashlib.sha256()
+    for ext_id in ext_ids:
+        h.update(hashlib.sha256(bytes.fromhex(ext_id) if type(ext_id) is str else ext_id).digest())
+    return h.digest()
+
+
+def entry_cost(entry: bytes):
+    """
+    Return the number of entry credits it costs to write a binary entry: one
+    for each started KiB, not counting the header.
+    """
+    return max((len(entry) - ENTRY_HEADER_SIZE + 1023) // 1024, 1)
+
+
+def entry_hashes(entries: Iterable[bytes], executor: Executor = None, chunk_size: int = 1024):
+    """
+    Return the hashes of many binary entries, given as bytes-like objects, in
+    order.
+
+    Args:
+        entries (iterable): The binary entries.
+        executor (concurrent.futures.Executor): If given, hash the entries in
+            chunks on this executor, e.g. a `ProcessPoolExecutor` for large
+            batches. Entries are copied to bytes to be sent to other processes.
+        chunk_size (int): Number of entries hashed by each executor call.
+    """
+    if executor is None:
+        return _entry_hashes(entries)
+    return _map_chunks(executor, _entry_hashes, [bytes(e) for e in entries], chunk_size)
+
+
+def chain_ids_from_ext_ids(
+    ext_ids_list: Iterable[List[Union[bytes, str]]],
+    executor: Executor = None,
+    chunk_size: int = 1024,
+):
+    """
+    Return the chain ids for many lists of external ids, in order. See
+    `entry_hashes()` for the arguments.
+    """
+    if executor is None:
+        return _chain_ids(ext_ids_list)
+    ext_ids_list = [[x if type(x) is str else bytes(x) for x in ext_ids]
+                    for ext_ids in ext_ids_list]
+    return _map_chunks(executor, _chain_ids, ext_ids_list, chunk_size)
+
+
+def entry_costs(entries: Iterable[bytes]):
+    """
+    Return the entry credit costs of many binary entries, in order.
+    """
+    return [max((len(e) - ENTRY_HEADER_SIZE + 1023) // 1024, 1) for e in entries]
+
+
+def _entry_hashes(entries):
+    sha256, sha512 = hashlib.sha256, hashlib.sha512
+    hashes = []
+    for entry in entries:
+        h = sha256(sha512(entry).digest())
+        h.update(entry)
+        hashes.append(h.digest())
+    return hashes
+
+
+def _chain_ids(ext_ids_list):
+    return [chain_id_from_ext_ids(ext_ids) for ext_ids in ext_ids_list]
+
+
+def _map_chunks(executor: Executor, func: Callable, items: list, chunk_size: int):
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    return [result for results in executor.map(func, chunks) for result in results]
+
+
+def ordered_map(func: Callable, iterable: Iterable, window: int, max_workers: int = None):
+    """
+    A generator that applies `func` to each item of `iterable` on a thread
+    pool, yielding the results in the same order as the input.
+
+    Args:
+        func (callable): Function to call with each item.
+        iterable (iterable): Items to process. Consumed lazily, so it may be
+            unbounded.
+        window (int): Maximum number of results in flight or waiting to be
+            yielded at any time. This bounds the memory held by results which
+            arrive ahead of their turn.
+        max_workers (int): Maximum number of concurrent calls to `func`.
+            Defaults to `window`.
+    """
+    items = iter(iterable)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers or window) as executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # The consumer may stop early, don't wait on work nobody wants
+            for future in pending:
+                future.cancel()
+
+
+class PackedBlockStack:
+    """
+    A stack of (keymr, dbheight) block pointers packed into 36 bytes each,
+    rather than the several hundred bytes taken by a tuple of a hex string and
+    an int.
+    """
+    _pointer = struct.Struct("<32sI")
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def __len__(self):
+        return len(self._data) // self._pointer.size
+
+    def push(self, keymr: Union[bytes, str], dbheight: int):
+        if type(keymr) is str:
+            keymr = bytes.fromhex(keymr)
+        self._data += self._pointer.pack(keymr, dbheight)
+
+    def pop(self):
+        """
+        Remove and return the most recently pushed (keymr, dbheight) pair, with
+        the keymr as a hex string.
+        """
+        if not self._data:
+            raise IndexError("pop from empty PackedBlockStack")
+        offset = len(self._data) - self._pointer.size
+        keymr, dbheight = self._pointer.unpack_from(self._data, offset)
+        del self._data[offset:]
+        return keymr.hex(), dbheight
@@ -13,8 +13,6 @@ CLASSIFIERS = [
     "License :: OSI Approved :: MIT License",
     "Operating System :: OS Independent",
     "Programming Language :: Python :: 3 :: Only",
-    "Programming Language :: Python :: 3.5",
-    "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
     "Programming Language :: Python :: 3.8",
     "Programming Language :: Python :: 3.9",
@@ -42,6 +40,10 @@ setup(
     install_requires=[
         "requests>=2.20.0",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.6"],
+        "compose": ["cryptography>=2.6"],
+    },
     url="https://github.com/FactomProject/factom-api",
-    python_requires='>=3.5'
+    python_requires='>=3.7'
 )
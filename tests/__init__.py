@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+import pytest
+
+from factom.client import NULL_BLOCK, Factomd
+
+
+CHAIN_ID = 'cc' * 32
+
+
+class FakeChain:
+    """
+    A fake factomd serving a single chain, with two entries in each entry
+    block.
+    """
+    def __init__(self, heights):
+        self.blocks = {}
+        self.head = NULL_BLOCK
+        self.calls = []
+        for height in heights:
+            self.append(height)
+
+    def append(self, height):
+        keymr = '{:064x}'.format(height)
+        self.blocks[keymr] = {
+            'header': {'chainid': CHAIN_ID, 'dbheight': height, 'prevkeymr': self.head},
+            'entrylist': [
+                {'entryhash': '{:062x}{:02x}'.format(height, i), 'timestamp': height}
+                for i in range(2)
+            ]
+        }
+        self.head = keymr
+
+    def request(self, method, params=None, request_id=0):
+        self.calls.append(method)
+        if method == 'heights':
+            height = max(block['header']['dbheight'] for block in self.blocks.values())
+            return {'directoryblockheight': height, 'entryheight': height}
+        if method == 'chain-head':
+            return {'chainhead': self.head}
+        if method == 'entry-block':
+            return self.blocks[params['keymr']]
+        if method == 'entry':
+            return {'chainid': CHAIN_ID, 'extids': [], 'content': params['hash']}
+        if method == 'dblock-by-height':
+            dbentries = [{'chainid': 'aa' * 32, 'keymr': 'ff' * 32}]
+            keymr = '{:064x}'.format(params['height'])
+            if keymr in self.blocks:
+                dbentries.append({'chainid': CHAIN_ID, 'keymr': keymr})
+            return {'dblock': {'dbentries': dbentries}}
+        raise NotImplementedError(method)
+
+
+@pytest.fixture
+def chain():
+    chain = FakeChain([10, 20, 30])
+    with patch.object(Factomd, '_request', side_effect=chain.request):
+        yield chain
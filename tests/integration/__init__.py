@@ -241,14 +241,21 @@ WALLETD_RESPONSES = {
 }
 
 
+def jsonrpc_reply(choices, data):
+    if isinstance(data, list):
+        return [jsonrpc_reply(choices, d) for d in reversed(data)]
+    if data['method'] not in choices:
+        return {'jsonrpc': '2.0', 'id': data['id'], 'error': {
+            'code': -32601,
+            'message': 'Method not found'
+        }}
+    return {'jsonrpc': '2.0', 'id': data['id'], 'result': choices[data['method']]}
+
+
 def _callback(choices):
     def _handle(request):
-        method = json.loads(request.body.decode())['method']
-        return (200, {}, json.dumps({
-            'jsonrpc': '2.0',
-            'id': 0,
-            'result': choices[method]
-        }))
+        data = json.loads(request.body.decode())
+        return (200, {}, json.dumps(jsonrpc_reply(choices, data)))
     return _handle
 
 
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from factom.exceptions import FactomAPIError
+from factom.pool import HedgingPolicy
+
+from . import FACTOMD_RESPONSES, WALLETD_RESPONSES, jsonrpc_reply
+from .test_api import CHAIN_ID, EC_1, ENTRY_1, ENTRY_2, FA_1
+
+
+web = pytest.importorskip('aiohttp.web')
+aio = pytest.importorskip('factom.aio')
+
+
+def _run(coro_func):
+    """
+    Start fake factomd and factom-walletd servers and run `coro_func` with
+    clients pointed at them.
+    """
+    def _app(choices):
+        async def handle(request):
+            return web.json_response(jsonrpc_reply(choices, await request.json()))
+        app = web.Application()
+        app.router.add_post('/v2', handle)
+        return app
+
+    async def main():
+        runners = []
+        hosts = []
+        for choices in (FACTOMD_RESPONSES, WALLETD_RESPONSES):
+            runner = web.AppRunner(_app(choices))
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = runner.addresses[0][1]
+            runners.append(runner)
+            hosts.append('http://127.0.0.1:{}'.format(port))
+
+        factomd = aio.AsyncFactomd(ec_address=EC_1, fct_address=FA_1, host=hosts[0])
+        walletd = aio.AsyncFactomWalletd(ec_address=EC_1, fct_address=FA_1, host=hosts[1])
+        try:
+            async with factomd, walletd:
+                return await coro_func(factomd, walletd)
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_read_chain():
+    async def read(factomd, walletd):
+        return [entry async for entry in factomd.read_chain(CHAIN_ID)]
+
+    assert _run(read) == [{
+        'chainid': CHAIN_ID,
+        'extids': [b'chain', b'id'],
+        'content': b'chain_content'
+    }]
+
+
+def test_new_entry():
+    async def new_entry(factomd, walletd):
+        return await walletd.new_entry(factomd, CHAIN_ID, [b'entry', b'id'], b'entry_content',
+                                       sleep=0)
+
+    assert _run(new_entry)['entryhash'] == ENTRY_2
+
+
+def test_batch():
+    async def batch(factomd, walletd):
+        async with factomd.batch() as batch:
+            entry = batch.entry(ENTRY_1)
+            head = batch.chain_head(CHAIN_ID)
+        return entry.result(), head.result()
+
+    entry, head = _run(batch)
+    assert entry['content'] == b'chain_content'
+    assert head['chaininprocesslist'] is False
+
+
+def test_batch_sends_nothing_for_multi_call_methods():
+    async def batch(factomd, walletd):
+        sent = []
+        post = walletd._post
+
+        async def _post(data, retry=False):
+            sent.append(data)
+            return await post(data, retry)
+
+        walletd._post = factomd._post = _post
+        batch = walletd.batch()
+        with pytest.raises(TypeError):
+            batch.fct_to_ec(factomd, 50000)
+        # Calling other methods of the client is refused, too
+        with pytest.raises(TypeError):
+            batch.fct_to_ec(None, 50000)
+        return sent, len(batch)
+
+    assert _run(batch) == ([], 0)
+
+
+def test_read_chain_prefetch():
+    async def read(factomd, walletd):
+        return [entry async for entry in factomd.read_chain(CHAIN_ID, prefetch=4)]
+
+    assert _run(read)[0]['content'] == b'chain_content'
+
+
+def test_single_host():
+    with pytest.raises(ValueError):
+        aio.AsyncFactomd(host=['http://a', 'http://b'])
+    with pytest.raises(ValueError):
+        aio.AsyncFactomd(hedging=HedgingPolicy())
+    with pytest.raises(TypeError):
+        aio.AsyncFactomd(pool_size=32)
+
+
+def test_retries_only_reads():
+    posts = []
+
+    def _app():
+        async def handle(request):
+            data = await request.json()
+            posts.append(data['method'])
+            if len(posts) % 2:
+                return web.json_response({'error': {'message': 'Unavailable'}}, status=503)
+            return web.json_response({'jsonrpc': '2.0', 'id': 0, 'result': {}})
+        app = web.Application()
+        app.router.add_post('/v2', handle)
+        return app
+
+    async def main():
+        runner = web.AppRunner(_app())
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        host = 'http://127.0.0.1:{}'.format(runner.addresses[0][1])
+        try:
+            async with aio.AsyncFactomd(host=host, retries=2) as factomd:
+                factomd.session.backoff = 0
+                await factomd.heights()
+                with pytest.raises(FactomAPIError):
+                    await factomd.commit_entry('00')
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+    assert posts == ['heights', 'heights', 'commit-entry']
@@ -1,8 +1,12 @@
+import json
 from unittest.mock import patch
 
 import pytest
 
+from factom.cache import LRUCache
 from factom.client import Factomd, FactomWalletd
+from factom.exceptions import MethodNotFound
+from factom.store import BlockStore
 
 from . import assert_jsonrpc_calls, responses  # noqa
 
@@ -143,3 +147,87 @@ def test_read_chain(responses, factomd, walletd):  # noqa
         ('entry-block', {'keymr': ENTRY_KEYMR}),
         ('entry', {'hash': ENTRY_1})
     ])
+
+
+def test_batch(responses, factomd):  # noqa
+    with factomd.batch() as batch:
+        entry = batch.entry(ENTRY_1)
+        block = batch.entry_block(ENTRY_KEYMR)
+        missing = batch.directory_block_head()
+
+    assert len(responses.calls) == 1
+    data = json.loads(responses.calls[0].request.body.decode())
+    assert [(d['id'], d['method']) for d in data] == [
+        (0, 'entry'), (1, 'entry-block'), (2, 'directory-block-head')
+    ]
+    assert entry.result() == {
+        'chainid': CHAIN_ID,
+        'extids': [b'chain', b'id'],
+        'content': b'chain_content'
+    }
+    assert block.result()['header']['chainid'] == CHAIN_ID
+    with pytest.raises(MethodNotFound):
+        missing.result()
+
+
+def test_batch_rejects_multi_request_methods(factomd):
+    batch = factomd.batch()
+    with pytest.raises(TypeError):
+        batch.read_chain(CHAIN_ID)
+    assert len(batch) == 0
+
+
+def test_batch_sends_nothing_for_multi_call_methods(responses, factomd, walletd):  # noqa
+    class Walletd(FactomWalletd):
+        def two_calls(self):
+            self.properties()
+            return self._request('address', {'address': EC_1})
+
+    batch = walletd.batch()
+    with pytest.raises(TypeError):
+        batch.fct_to_ec(factomd, 50000)
+    with pytest.raises(TypeError):
+        batch.new_entry(factomd, CHAIN_ID, [b'entry', b'id'], b'entry_content')
+    with pytest.raises(TypeError):
+        Walletd().batch().two_calls()
+    assert len(batch) == 0
+    assert len(responses.calls) == 0
+
+
+def test_read_chain_prefetch(responses, factomd):  # noqa
+    res = list(factomd.read_chain(CHAIN_ID, include_entry_context=True, prefetch=4))
+
+    assert res == [{
+        'chainid': CHAIN_ID,
+        'extids': [b'chain', b'id'],
+        'content': b'chain_content',
+        'entryhash': ENTRY_1,
+        'timestamp': 1512902940,
+        'dbheight': 537
+    }]
+
+
+def test_cache(responses):  # noqa
+    factomd = Factomd(cache=LRUCache())
+    for _ in range(2):
+        factomd.entry(ENTRY_1)
+        factomd.chain_head(CHAIN_ID)
+
+    assert_jsonrpc_calls(responses, [
+        ('entry', {'hash': ENTRY_1}),
+        ('chain-head', {'chainid': CHAIN_ID}),
+        ('chain-head', {'chainid': CHAIN_ID})
+    ])
+    assert factomd.entry(ENTRY_1)['content'] == b'chain_content'
+    assert factomd.cache.stats['hits'] == 2
+
+
+def test_store(responses, tmp_path):  # noqa
+    path = str(tmp_path / 'blocks.db')
+    Factomd(store=BlockStore(path)).entry(ENTRY_1)
+
+    factomd = Factomd(cache=LRUCache(), store=BlockStore(path))
+    assert factomd.entry(ENTRY_1)['content'] == b'chain_content'
+    assert factomd.entry(ENTRY_1)['content'] == b'chain_content'
+    assert len(responses.calls) == 1
+    assert factomd.cache.stats['hits'] == 1
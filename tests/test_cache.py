@@ -0,0 +1,27 @@
+from factom.cache import LRUCache
+
+
+def test_lru_eviction():
+    c = LRUCache(max_bytes=10)
+    c.set('a', b'1234')
+    c.set('b', b'1234')
+    assert c.get('a') == b'1234'
+
+    c.set('c', b'1234')  # Evicts 'b', the least recently used
+    assert 'b' not in c
+    assert c.get('b') is None
+    assert c.stats == {
+        'entries': 2,
+        'size': 8,
+        'max_bytes': 10,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 1,
+        'evicted_bytes': 4,
+    }
+
+
+def test_lru_oversized_value():
+    c = LRUCache(max_bytes=4)
+    c.set('a', b'12345')
+    assert len(c) == 0
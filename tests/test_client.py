@@ -1,4 +1,13 @@
-from factom.client import BaseAPI
+from unittest.mock import Mock, patch
+
+from factom.client import BaseAPI, Factomd
+from factom.index import ChainIndex
+
+from . import CHAIN_ID, chain  # noqa
+
+
+def _contents(entries):
+    return [bytes.hex(e['content'])[:62] for e in entries]
 
 
 def test_init():
@@ -13,7 +22,88 @@ def test_init():
     assert c.session.verify == '/cert.pem'
 
 
+def test_retries_only_reads():
+    factomd = Factomd(retries=3, timeout=(1, 10))
+    resp = Mock(status_code=200)
+    resp.json.return_value = {'result': {}}
+
+    assert factomd.session.retries == 3
+    assert factomd.session.timeout == (1, 10)
+    with patch.object(factomd.session, 'request', return_value=resp) as request:
+        factomd.heights()
+        factomd.entry_block('aa' * 32)
+        factomd.commit_entry('00')
+        factomd.reveal_entry('00')
+    assert [c[1]['retry'] for c in request.call_args_list] == [True, True, False, False]
+
+
 def test_url():
     c = BaseAPI(host='http://somehost', version='v3')
 
     assert c.url == 'http://somehost/v3'
+
+
+def test_read_chain_index(chain):  # noqa
+    factomd = Factomd(chain_index=ChainIndex())
+    entries = list(factomd.read_chain(CHAIN_ID, from_height=20))
+
+    assert _contents(entries) == ['{:062x}'.format(h) for h in (20, 20, 30, 30)]
+    # The first read indexes the whole chain
+    assert chain.calls.count('entry-block') == 3
+
+    chain.append(40)
+    chain.calls.clear()
+    entries = list(factomd.read_chain(CHAIN_ID, from_height=30))
+
+    assert _contents(entries) == ['{:062x}'.format(h) for h in (30, 30, 40, 40)]
+    # Only the new block is walked, the indexed block at height 30 is refetched
+    assert chain.calls == ['chain-head', 'entry-block', 'entry-block'] + ['entry'] * 4
+    assert factomd.chain_index.tip(CHAIN_ID) == '{:064x}'.format(40)
+
+
+def test_read_chain_low_memory(chain):  # noqa
+    entries = list(Factomd().read_chain(CHAIN_ID, from_height=20, low_memory=True))
+
+    assert _contents(entries) == ['{:062x}'.format(h) for h in (20, 20, 30, 30)]
+    # Blocks are fetched once during the walk and again as they're read
+    assert chain.calls.count('entry-block') == 5
+
+
+def test_read_chain_reverse(chain):  # noqa
+    entries = list(Factomd().read_chain_reverse(CHAIN_ID, limit=3))
+
+    assert _contents(entries) == ['{:062x}'.format(h) for h in (30, 30, 20)]
+    assert [e['content'][-1] for e in entries] == [1, 0, 1]
+    # Only the blocks holding the yielded entries are fetched
+    assert chain.calls == ['chain-head', 'entry-block', 'entry', 'entry', 'entry-block', 'entry']
+
+
+def test_read_chain_reverse_until_height(chain):  # noqa
+    entries = list(Factomd().read_chain_reverse(CHAIN_ID, until_height=20))
+
+    assert _contents(entries) == ['{:062x}'.format(h) for h in (30, 30, 20, 20)]
+
+
+def test_read_chain_range(chain):  # noqa
+    factomd = Factomd()
+    assert list(factomd.entry_blocks_in_range(CHAIN_ID, 15, 35)) == [
+        ('{:064x}'.format(20), 20),
+        ('{:064x}'.format(30), 30)
+    ]
+
+    entries = list(factomd.read_chain_range(CHAIN_ID, 5, 20, include_entry_context=True,
+                                            max_workers=4))
+    assert [e['dbheight'] for e in entries] == [10, 10, 20, 20]
+    assert [e['timestamp'] for e in entries] == [10, 10, 20, 20]
+
+
+def test_entries_at_height_for_chains(chain):  # noqa
+    factomd = Factomd()
+    results = factomd.entries_at_height_for_chains([CHAIN_ID, 'bb' * 32], 20)
+
+    assert list(results) == [CHAIN_ID]
+    assert _contents(results[CHAIN_ID]) == ['{:062x}'.format(20)] * 2
+
+    # The directory block index is reused for later lookups at the same height
+    list(factomd.entries_at_height(CHAIN_ID, 20))
+    assert chain.calls.count('dblock-by-height') == 1
@@ -0,0 +1,72 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+from factom.compose import EntryComposer, decode_address, encode_address
+
+from .integration.test_api import (
+    CHAIN_ID,
+    COMMIT_CHAIN_MSG,
+    COMMIT_ENTRY_MSG,
+    EC_1,
+    REVEAL_CHAIN_MSG,
+    REVEAL_ENTRY_MSG
+)
+
+
+EC_PUBLIC = b'\x59\x2a'
+EC_SECRET = b'\x5d\xb6'
+EC_1_KEY = '0cf8b115fc135b45b9f11e2aff638591cb382e238b4d31e4a3de4912a69740ff'
+
+
+def _verify(public_key, message, signed_size):
+    Ed25519PublicKey.from_public_bytes(public_key).verify(
+        message[signed_size + 32:], message[:signed_size])
+
+
+@pytest.fixture
+def composer():
+    return EntryComposer(encode_address(EC_SECRET, bytes(range(32))))
+
+
+def test_address():
+    assert decode_address(EC_1, EC_PUBLIC).hex() == EC_1_KEY
+    assert encode_address(EC_PUBLIC, bytes.fromhex(EC_1_KEY)) == EC_1
+    with pytest.raises(ValueError):
+        decode_address(EC_1, EC_SECRET)
+    with pytest.raises(ValueError):
+        decode_address(EC_1[:-1] + 'j', EC_PUBLIC)
+
+
+def test_compose_entry(composer):
+    calls = composer.compose_entry(CHAIN_ID, [b'entry', b'id'], b'entry_content',
+                                   timestamp=0x016040077860 / 1000)
+    commit = bytes.fromhex(calls['commit']['params']['message'])
+    expected = bytes.fromhex(COMMIT_ENTRY_MSG)
+
+    assert calls['commit']['method'] == 'commit-entry'
+    assert calls['reveal'] == {'jsonrpc': '2.0', 'id': 0, 'method': 'reveal-entry',
+                               'params': {'entry': REVEAL_ENTRY_MSG}}
+    assert commit[:40] == expected[:40]
+    assert commit[40:72] == composer.public_key
+    _verify(composer.public_key, commit, 40)
+    # The walletd generated fixture is signed the same way
+    _verify(expected[40:72], expected, 40)
+
+
+def test_compose_chain(composer):
+    calls = composer.compose_chain([b'chain', b'id'], b'chain_content',
+                                   timestamp=0x016040044481 / 1000)
+    commit = bytes.fromhex(calls['commit']['params']['message'])
+    expected = bytes.fromhex(COMMIT_CHAIN_MSG)
+
+    assert calls['commit']['method'] == 'commit-chain'
+    assert calls['reveal']['params']['entry'] == REVEAL_CHAIN_MSG
+    assert commit[:104] == expected[:104]
+    _verify(composer.public_key, commit, 104)
+    _verify(expected[104:136], expected, 104)
+
+
+def test_compose_checks_address(composer):
+    composer.compose_entry(CHAIN_ID, [], b'', ec_address=composer.ec_address)
+    with pytest.raises(ValueError):
+        composer.compose_entry(CHAIN_ID, [], b'', ec_address=EC_1)
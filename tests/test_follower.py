@@ -0,0 +1,32 @@
+from factom.client import Factomd
+from factom.follower import ChainFollower, FileCheckpoint
+
+from . import CHAIN_ID, chain  # noqa
+
+
+def test_follower(chain, tmp_path):  # noqa
+    checkpoint = str(tmp_path / 'height')
+    received = []
+    follower = ChainFollower(Factomd(), [CHAIN_ID, 'bb' * 32], checkpoint=checkpoint,
+                             start_height=15)
+    follower.subscribe(CHAIN_ID, received.append)
+
+    entries = follower.poll()
+    assert [e['content'][-2] for e in entries] == [20, 20, 30, 30]
+    assert received == entries
+    assert FileCheckpoint(checkpoint).load() == 30
+
+    chain.append(31)
+    chain.calls.clear()
+    follower = ChainFollower(Factomd(), [CHAIN_ID], checkpoint=checkpoint)
+    assert [e['content'][-2] for e in follower.poll()] == [31, 31]
+    # A single directory block is fetched for the new height
+    assert chain.calls == ['heights', 'dblock-by-height', 'entry-block', 'entry', 'entry']
+
+
+def test_follower_starts_at_next_block(chain):  # noqa
+    follower = ChainFollower(Factomd(), [CHAIN_ID])
+    assert follower.poll() == []
+
+    chain.append(32)
+    assert len(follower.poll()) == 2
@@ -0,0 +1,45 @@
+import pytest
+
+from factom.index import ChainIndex, SQLiteChainIndex
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def index(request, tmp_path):
+    if request.param == 'memory':
+        return ChainIndex()
+    return SQLiteChainIndex(str(tmp_path / 'index.db'))
+
+
+def test_index(index):
+    assert index.tip('c1') is None
+
+    index.extend('c1', [('a', 10), ('b', 20)])
+    index.extend('c1', [('c', 30)])
+    index.extend('c2', [('x', 15)])
+
+    assert index.tip('c1') == 'c'
+    assert list(index.blocks('c1')) == [('a', 10), ('b', 20), ('c', 30)]
+    assert list(index.blocks('c1', from_height=20)) == [('b', 20), ('c', 30)]
+
+    index.remove('c1')
+    assert index.tip('c1') is None
+    assert index.tip('c2') == 'x'
+
+
+def test_index_skips_known_blocks(index):
+    index.extend('c1', [('a', 10), ('b', 20)])
+    # Another reader working from the same, now stale, tip
+    index.extend('c1', [('b', 20), ('c', 30)])
+
+    assert index.tip('c1') == 'c'
+    assert list(index.blocks('c1')) == [('a', 10), ('b', 20), ('c', 30)]
+
+
+def test_sqlite_index_skips_known_blocks(tmp_path):
+    path = str(tmp_path / 'index.db')
+    SQLiteChainIndex(path).extend('c1', [('a', 10), ('b', 20)])
+
+    # A second process working from a stale tip
+    SQLiteChainIndex(path).extend('c1', [('b', 20), ('c', 30)])
+
+    assert list(SQLiteChainIndex(path).blocks('c1')) == [('a', 10), ('b', 20), ('c', 30)]
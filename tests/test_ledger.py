@@ -0,0 +1,105 @@
+from unittest.mock import Mock
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from factom.exceptions import InsufficientEntryCredits, InternalError
+from factom.ledger import ECLedger
+from factom.submit import BulkSubmitter
+
+from . import CHAIN_ID
+
+
+EC_1 = 'EC1rs7S56bWgTXN8XvaqhFenzRoHiUpHV2dYvwS7cJpqfb9HaRhi'
+
+
+def _factomd(*balances):
+    factomd = Mock(ec_address=EC_1)
+    factomd.multiple_entry_credit_balances.side_effect = [
+        {'currentheight': 10 + i, 'balances': [{'ack': b, 'saved': b, 'err': ''}]}
+        for i, b in enumerate(balances)
+    ]
+    factomd.entry_credit_rate.return_value = {'rate': 1000}
+    return factomd
+
+
+def test_cost():
+    assert ECLedger.cost([b'id'], b'x' * 1000) == 1
+    assert ECLedger.cost([b'id'], b'x' * 1100) == 2
+    assert ECLedger.cost([b'id'], b'x' * 1000, new_chain=True) == 11
+
+
+def test_reserve_and_reconcile():
+    factomd = _factomd(10, 7, 20, 20)
+    ledger = ECLedger(factomd)
+
+    ledger.reserve(3)
+    ledger.reserve(2)
+    assert ledger.available() == 5
+    ledger.confirm(3)
+    ledger.release(2)
+    assert ledger.available() == 7
+    assert factomd.multiple_entry_credit_balances.call_count == 1
+
+    # factomd has seen the commit, so it is no longer counted as spent
+    # Heights need not match those factomd reports
+    ledger.reconcile(height=500)
+    ledger.reconcile(height=500)
+    assert ledger.available() == 7
+    assert factomd.multiple_entry_credit_balances.call_count == 2
+
+    # Reconciles again before giving up
+    ledger.reserve(15)
+    assert ledger.available() == 5
+    with pytest.raises(InsufficientEntryCredits):
+        ledger.reserve(6)
+
+
+def test_top_up():
+    factomd, walletd = _factomd(10, 100), Mock()
+    ledger = ECLedger(factomd, walletd, [EC_1], top_up_threshold=5, top_up_amount=90)
+
+    ledger.reserve(4)
+    assert not walletd.fct_to_ec.called
+    ledger.reserve(4)
+    ledger.reserve(1)
+    walletd.fct_to_ec.assert_called_once_with(factomd, 90000, fct_address=None, ec_address=EC_1)
+
+    ledger.reconcile()
+    assert ledger.available() == 91
+
+
+def test_failed_top_up_keeps_reservation():
+    factomd, walletd = _factomd(10), Mock()
+    walletd.fct_to_ec.side_effect = ConnectionError()
+    ledger = ECLedger(factomd, walletd, [EC_1], top_up_threshold=8, top_up_amount=90)
+
+    ledger.reserve(5)
+    assert walletd.fct_to_ec.called
+    assert ledger.available() == 5
+    ledger.release(5)
+    assert ledger.available() == 10
+
+    with pytest.raises(ValueError):
+        ECLedger(factomd, walletd, top_up_threshold=8)
+
+
+def test_submitter_reserves_entry_credits():
+    factomd, walletd = _factomd(1, 0), Mock(ec_address=EC_1)
+    walletd.compose_entry.return_value = {
+        'commit': {'params': {'message': 'commit'}},
+        'reveal': {'params': {'entry': 'reveal'}},
+    }
+    factomd.commit_entry.side_effect = [InternalError()] * 6 + [None]
+    submitter = BulkSubmitter(factomd, walletd, max_workers=1, backoff=0,
+                              ledger=ECLedger(factomd))
+    entry = {'chain_id': CHAIN_ID, 'ext_ids': [], 'content': b''}
+
+    first, second = submitter.submit([entry, entry])
+    assert isinstance(first['error'], InternalError)
+    assert not second['error']
+    assert submitter.ledger.available(EC_1) == 0
+
+    third, = submitter.submit([entry])
+    assert isinstance(third['error'], InsufficientEntryCredits)
+    assert factomd.commit_entry.call_count == 7
@@ -0,0 +1,244 @@
+import asyncio
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+from factom.livefeed.aio import AsyncLiveFeedListener
+from factom.livefeed.dispatch import LiveFeedDispatcher
+from factom.livefeed.events import ENTRY_REVEAL, NODE_MESSAGE, LiveFeedRouter, peek_event
+from factom.livefeed.listener import FrameReader
+from factom.livefeed.replay import LiveFeedRecorder, LiveFeedReplay
+from tests import CHAIN_ID
+
+
+def _frame(message):
+    return b'\x01' + struct.pack('<i', len(message)) + message
+
+
+def _send_slowly(sock, data):
+    # Send a byte at a time so every read comes up short
+    for i in range(len(data)):
+        sock.sendall(data[i:i + 1])
+    sock.shutdown(socket.SHUT_WR)
+
+
+def test_frame_reader():
+    ours, theirs = socket.socketpair()
+    messages = [b'first', b'x' * 100, b'']
+    data = b''.join(_frame(m) for m in messages)
+    sender = threading.Thread(target=_send_slowly, args=(theirs, data))
+    sender.start()
+
+    reader = FrameReader(ours, buffer_size=16)
+    received = [bytes(m) for m in reader]
+    sender.join()
+
+    assert received == messages
+    assert theirs.recv(16) == b'\x01\x01\x01'
+
+
+def test_frame_reader_truncated():
+    ours, theirs = socket.socketpair()
+    theirs.sendall(_frame(b'message')[:-2])
+    theirs.shutdown(socket.SHUT_WR)
+
+    with pytest.raises(ConnectionResetError):
+        FrameReader(ours).read_frame()
+
+
+@pytest.mark.parametrize('use_async_handler', [False, True])
+def test_async_listener(use_async_handler):
+    received = []
+
+    async def async_handle(message):
+        received.append(message)
+
+    async def main():
+        listener = AsyncLiveFeedListener(async_handle if use_async_handler else received.append,
+                                         port=0)
+        await listener.start()
+        port = listener.sockets[0].getsockname()[1]
+
+        nodes = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+        for i, (_, writer) in enumerate(nodes):
+            writer.write(_frame('node {}'.format(i).encode()))
+        echoes = [await reader.readexactly(1) for reader, _ in nodes]
+
+        # A node reconnecting after the others have gone away is still accepted
+        for _, writer in nodes:
+            writer.close()
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(_frame(b'again'))
+        echoes.append(await reader.readexactly(1))
+        writer.close()
+
+        while len(received) < 3:
+            await asyncio.sleep(0.01)
+        listener.close()
+        return echoes
+
+    assert asyncio.run(main()) == [b'\x01'] * 3
+    assert sorted(received) == [b'again', b'node 0', b'node 1']
+
+
+def _blocked_dispatcher(overflow, **kwargs):
+    # A single worker stuck on its first event until the gate is opened
+    gate = threading.Event()
+    handled = []
+
+    def handle(message):
+        gate.wait()
+        handled.append(message)
+
+    dispatcher = LiveFeedDispatcher(handle, workers=1, queue_size=2, overflow=overflow, **kwargs)
+    dispatcher(memoryview(b'first'))
+    while dispatcher.queue_depth:
+        pass
+    return dispatcher, gate, handled
+
+
+def test_dispatcher_drop_oldest():
+    dispatcher, gate, handled = _blocked_dispatcher('drop-oldest')
+    for i in range(5):
+        dispatcher(str(i).encode())
+    gate.set()
+    dispatcher.close()
+
+    assert handled == [b'first', b'3', b'4']
+    assert dispatcher.stats['dropped'] == 3
+
+
+def test_dispatcher_spill(tmpdir):
+    dispatcher, gate, handled = _blocked_dispatcher('spill', spill_dir=str(tmpdir))
+    for i in range(5):
+        dispatcher(str(i).encode())
+    assert dispatcher.stats['spilled'] == 3
+    assert dispatcher.queue_depth == 5
+    gate.set()
+    dispatcher.close()
+
+    assert handled == [b'first', b'0', b'1', b'2', b'3', b'4']
+    assert dispatcher.stats['handled'] == 6
+    assert dispatcher.queue_depth == 0
+
+
+def test_dispatcher_keeps_key_order():
+    handled = {}
+    lock = threading.Lock()
+
+    def handle(message):
+        key, _, n = message.partition(b':')
+        with lock:
+            handled.setdefault(key, []).append(int(n))
+
+    dispatcher = LiveFeedDispatcher(handle, workers=3, queue_size=4,
+                                    key=lambda message: message.partition(b':')[0])
+    for n in range(50):
+        for key in (b'a', b'b', b'c', b'd'):
+            dispatcher(key + b':' + str(n).encode())
+    dispatcher.close()
+
+    assert handled == {key: list(range(50)) for key in (b'a', b'b', b'c', b'd')}
+    assert dispatcher.stats['dispatched'] == 200
+
+
+def _varint(n):
+    out = b''
+    while n >= 0x80:
+        out += bytes([n & 0x7F | 0x80])
+        n >>= 7
+    return out + bytes([n])
+
+
+def _pb(number, value):
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _entry_reveal(chain_id, content):
+    entry = _pb(1, b'\xee' * 32) + _pb(2, _pb(1, b'id')) + _pb(3, _pb(1, content)) \
+        + _pb(4, bytes.fromhex(chain_id))
+    return _pb(1, 2) + _pb(2, b'node-0') + _pb(6, _pb(1, 1) + _pb(2, entry))
+
+
+def test_peek_event():
+    assert peek_event(memoryview(_entry_reveal(CHAIN_ID, b'hello'))) == (ENTRY_REVEAL, CHAIN_ID)
+    assert peek_event(_pb(2, b'node-0') + _pb(10, _pb(3, b'hi'))) == (NODE_MESSAGE, None)
+    assert peek_event(_pb(2, b'node-0')) == (None, None)
+
+
+def test_router():
+    other_chain = 'dd' * 32
+    reveals, messages, everything = [], [], []
+    router = LiveFeedRouter()
+    router.subscribe(reveals.append, types=[ENTRY_REVEAL], chain_ids=[CHAIN_ID])
+    router.subscribe(messages.append, types=[NODE_MESSAGE])
+    router.subscribe(everything.append)
+
+    router(memoryview(_entry_reveal(CHAIN_ID, b'hello')))
+    router(_entry_reveal(other_chain, b'ignored'))
+    router(_pb(10, _pb(1, 3) + _pb(3, 'caf\u00e9'.encode())))
+    router(b'\xff')
+
+    assert len(everything) == 3
+    assert [e.chain_id for e in reveals] == [CHAIN_ID]
+    reveal = reveals[0]
+    assert reveal is everything[0]
+    assert reveal.node_name == 'node-0'
+    assert reveal.source == 2
+    entry = reveal.payload.entry
+    assert entry.external_ids == [b'id']
+    assert entry.content == b'hello'
+    assert entry.chain_id.hex() == CHAIN_ID
+    assert reveal.payload.timestamp is None
+    assert messages[0].payload.message_code == 3
+    assert messages[0].payload.message_text == 'caf\u00e9'
+
+
+def test_record_and_replay(tmpdir):
+    path = str(tmpdir.join('feed.log'))
+    passed_on = []
+    messages = [b'first', b'', b'x' * 1000]
+    with LiveFeedRecorder(path, handle=passed_on.append) as recorder:
+        for message in messages:
+            recorder(memoryview(message))
+    assert passed_on == messages
+
+    replayed = []
+    with LiveFeedReplay(path, lambda m: replayed.append(bytes(m)), speed=1000.0) as replay:
+        assert len(replay) == 3
+        assert replay.run() == 3
+        assert bytes(replay[2][1]) == messages[2]
+        assert replay.run(start=1, stop=2) == 1
+    assert replayed == messages + [b'']
+
+
+def test_replay_handler_keeps_events(tmpdir):
+    path = str(tmpdir.join('feed.log'))
+    with LiveFeedRecorder(path) as recorder:
+        recorder(b'first')
+        recorder(b'second')
+
+    kept = []
+    with LiveFeedReplay(path, kept.append) as replay:
+        replay.run()
+    assert [bytes(m) for m in kept] == [b'first', b'second']
+
+
+def test_replay_rebuilds_index_and_skips_truncated_record(tmpdir):
+    path = str(tmpdir.join('feed.log'))
+    with LiveFeedRecorder(path) as recorder:
+        recorder(b'first')
+        recorder(b'second')
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+
+    with LiveFeedReplay(path) as replay:
+        assert [bytes(m) for _, m in replay] == [b'first']
+    os.remove(path + '.idx')
+    with LiveFeedReplay(path) as replay:
+        assert [bytes(m) for _, m in replay] == [b'first']
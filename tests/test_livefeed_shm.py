@@ -0,0 +1,89 @@
+import multiprocessing
+import struct
+
+import pytest
+
+
+# multiprocessing.shared_memory is new in Python 3.8
+shm = pytest.importorskip('factom.livefeed.shm')
+BufferOverrun = shm.BufferOverrun
+SharedMemoryReader = shm.SharedMemoryReader
+SharedMemoryWriter = shm.SharedMemoryWriter
+
+
+def test_shared_memory_fan_out():
+    messages = [str(i).encode() * (i % 7) for i in range(200)]
+    writer = SharedMemoryWriter(size=256)
+    readers = [SharedMemoryReader(writer.name, from_start=True) for _ in range(2)]
+    received = [[], []]
+    for message in messages:
+        writer(memoryview(message))
+        for reader, out in zip(readers, received):
+            out.append(bytes(reader.read(timeout=0)))
+    assert readers[0].read(timeout=0) is None
+    writer.close()
+    for reader in readers:
+        assert reader.read() is None
+        reader.close()
+
+    assert received == [messages, messages]
+
+
+def test_shared_memory_overrun():
+    with SharedMemoryWriter(size=64) as writer:
+        with SharedMemoryReader(writer.name) as reader:
+            for i in range(20):
+                writer(b'%d' % i)
+            with pytest.raises(BufferOverrun):
+                reader.read()
+            writer(b'next')
+            assert bytes(reader.read()) == b'next'
+
+
+def test_shared_memory_lapped_while_held():
+    with SharedMemoryWriter(size=64) as writer:
+        with SharedMemoryReader(writer.name) as reader:
+            # Records of 12 bytes
+            writer(b'A' * 8)
+            writer(b'B' * 8)
+            assert bytes(reader.read()) == b'A' * 8
+            for _ in range(4):
+                writer(b'H' * 8)
+            # B is intact, but A was overwritten while in use
+            with pytest.raises(BufferOverrun):
+                reader.read()
+            writer(b'next')
+            assert bytes(reader.read()) == b'next'
+
+
+def test_shared_memory_overwrite_in_progress():
+    with SharedMemoryWriter(size=64) as writer:
+        with SharedMemoryReader(writer.name) as reader:
+            writer(b'A' * 8)
+            assert bytes(reader.read()) == b'A' * 8
+            # The writer has announced it is writing over the event, but not
+            # yet published anything
+            struct.pack_into('<Q', writer._buffer, 24, writer.head + 64)
+            with pytest.raises(BufferOverrun):
+                reader.read(timeout=0)
+
+
+def _consume_shared_memory(name, attached, received):
+    with SharedMemoryReader(name) as reader:
+        attached.set()
+        received.put([bytes(m) for m in reader])
+
+
+def test_shared_memory_other_process():
+    context = multiprocessing.get_context('spawn')
+    attached, received = context.Event(), context.Queue()
+    with SharedMemoryWriter(size=1024) as writer:
+        process = context.Process(target=_consume_shared_memory,
+                                  args=(writer.name, attached, received))
+        process.start()
+        assert attached.wait(30)
+        for i in range(10):
+            writer(b'event %d' % i)
+
+    assert received.get(timeout=30) == [b'event %d' % i for i in range(10)]
+    process.join()
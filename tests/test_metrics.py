@@ -0,0 +1,60 @@
+from unittest.mock import Mock, patch
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from factom.client import Factomd
+from factom.exceptions import BlockNotFound
+from factom.metrics import RPCEvent, RPCMetrics
+
+
+def _response(status_code, body):
+    resp = Mock(status_code=status_code, content=b'x' * 10)
+    resp.json.return_value = body
+    return resp
+
+
+def test_events():
+    events = []
+    factomd = Factomd(hooks=[events.append, Mock(side_effect=ValueError)])
+    replies = [
+        _response(200, {'result': {}}),
+        _response(404, {'error': {'code': -32008, 'message': 'Block not found'}}),
+        ConnectionError(),
+    ]
+
+    with patch.object(factomd.session, 'request', side_effect=replies):
+        factomd.heights()
+        with pytest.raises(BlockNotFound):
+            factomd.entry_block('aa' * 32)
+        with pytest.raises(ConnectionError):
+            factomd.properties()
+
+    ok, not_found, failed = events
+    assert (ok.method, ok.status, ok.response_bytes, ok.error) == ('heights', 200, 10, None)
+    assert ok.request_bytes == len('{"jsonrpc": "2.0", "id": 0, "method": "heights"}')
+    assert (not_found.status, not_found.error_code, not_found.error) == (
+        404, -32008, 'BlockNotFound')
+    assert (failed.status, failed.response_bytes, failed.error) == (None, 0, 'ConnectionError')
+
+
+def test_metrics():
+    metrics = RPCMetrics(buckets=[0.1, 1])
+    metrics(RPCEvent('entry', 0.05, 100, 200, 200))
+    metrics(RPCEvent('entry', 0.5, 100, 0, None, error='Timeout'))
+    metrics(RPCEvent('entry', 5, 100, 50, 404, -32008, 'BlockNotFound'))
+
+    stats = metrics.as_dict()['entry']
+    assert stats['calls'] == 3
+    assert stats['errors'] == {'Timeout': 1, '-32008': 1}
+    assert stats['buckets'] == {0.1: 1, 1: 2, float('inf'): 3}
+    assert (stats['request_bytes'], stats['response_bytes']) == (300, 250)
+
+    text = metrics.prometheus()
+    assert 'factom_rpc_duration_seconds_bucket{method="entry",le="+Inf"} 3\n' in text
+    assert 'factom_rpc_duration_seconds_count{method="entry"} 3\n' in text
+    assert 'factom_rpc_errors_total{method="entry",error="-32008"} 1\n' in text
+    assert 'factom_rpc_response_bytes_total{method="entry"} 250\n' in text
+
+    metrics.reset()
+    assert metrics.as_dict() == {}
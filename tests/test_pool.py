@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from factom.client import Factomd, FactomWalletd
+from factom.pool import HedgingPolicy, NodePool
+
+
+def _response(result):
+    resp = Mock(status_code=200)
+    resp.json.return_value = {'result': result}
+    return resp
+
+
+def test_least_outstanding():
+    pool = NodePool(['http://a', 'http://b', 'http://c'])
+    a, b, c = pool.nodes
+
+    chosen = {pool.acquire() for _ in range(3)}
+    assert chosen == {a, b, c}
+    pool.release(b)
+    assert pool.acquire() is b
+    assert pool.acquire(write=True) is a
+
+
+def test_ejection():
+    pool = NodePool(['http://a', 'http://b'], max_failures=2, ejection_time=60)
+    a, b = pool.nodes
+
+    for _ in range(2):
+        pool.acquire(write=True)
+        pool.release(a, failed=True)
+    assert pool.stats['http://a']['ejected']
+    # Writes fall back to the other nodes while the preferred one is out
+    assert pool.acquire(write=True) is b
+    pool.release(b)
+    assert pool.acquire(write=True, exclude=[b]) is a
+
+
+def test_lag():
+    pool = NodePool(['http://a', 'http://b', 'http://c'], max_lag=1)
+    a, b, c = pool.nodes
+
+    pool.update_heights({a: 100, b: 99, c: 97})
+    assert [n.behind for n in pool.nodes] == [False, False, True]
+    assert all(pool.acquire() is not c for _ in range(10))
+
+    pool.update_heights({c: None})
+    assert c.behind
+    pool.update_heights({c: 100})
+    assert not c.behind
+
+
+def test_factomd_hosts():
+    factomd = Factomd(host=['http://a', 'http://b'])
+    heights = {'directoryblockheight': 10, 'entryheight': 10}
+
+    def request(method, url, **kwargs):
+        if url == 'http://a/v2' and kwargs['retry']:
+            raise ConnectionError()
+        return _response(heights)
+
+    with patch.object(factomd.session, 'request', side_effect=request) as mock:
+        # Two reads, so that a isn't ejected
+        for _ in range(2):
+            assert factomd.heights() == heights
+        factomd.commit_entry('00')
+    # Reads fail over from a to b, writes go to a
+    urls = [c[0][1] for c in mock.call_args_list]
+    assert urls[-1] == 'http://a/v2'
+    assert set(urls[:-1]) <= {'http://a/v2', 'http://b/v2'}
+    assert factomd.url == 'http://a/v2'
+
+    with patch.object(factomd.session, 'request', side_effect=ConnectionError()):
+        with pytest.raises(ConnectionError):
+            factomd.commit_entry('00')
+        factomd.check_nodes()
+    assert [n.height for n in factomd.pool.nodes] == [None, None]
+
+
+def test_walletd_single_host():
+    # Each wallet holds its own addresses and temporary transactions
+    with pytest.raises(ValueError):
+        FactomWalletd(host=['http://a', 'http://b'])
+
+
+def test_check_nodes():
+    factomd = Factomd(host=NodePool(['http://a', 'http://b'], check_interval=None))
+    replies = {
+        'http://a/v2': {'directoryblockheight': 10, 'entryheight': 10},
+        'http://b/v2': {'directoryblockheight': 10, 'entryheight': 5},
+    }
+
+    with patch.object(factomd.session, 'request',
+                      side_effect=lambda method, url, **kwargs: _response(replies[url])) as request:
+        factomd.check_nodes()
+    assert factomd.pool.stats['http://b']['behind']
+    assert factomd.pool.stats['http://b']['height'] == 5
+    # A node which never answers mustn't hold up the check
+    assert all(call[1]['timeout'] == 2.0 for call in request.call_args_list)
+
+
+def test_one_check_at_a_time():
+    factomd = Factomd(host=NodePool(['http://a', 'http://b'], check_interval=0))
+    release = threading.Event()
+    checks = []
+
+    def check_nodes():
+        checks.append(1)
+        release.wait(5)
+
+    with patch.object(factomd, 'check_nodes', side_effect=check_nodes), \
+            patch.object(factomd.session, 'request', return_value=_response(1)):
+        factomd.heights()
+        factomd.heights()
+        release.set()
+    assert len(checks) == 1
+
+
+def test_hedging_delay():
+    hedging = HedgingPolicy(percentile=90, min_delay=0.01, initial_delay=1, window=50)
+
+    for i in range(49):
+        hedging.record(i / 100)
+    assert hedging.delay == 1
+    hedging.record(0.49)
+    assert hedging.delay == 0.45
+    for _ in range(50):
+        hedging.record(0)
+    assert hedging.delay == 0.01
+
+
+def test_hedged_reads():
+    hedging = HedgingPolicy(initial_delay=0.01)
+    factomd = Factomd(host=['http://a', 'http://b'], hedging=hedging)
+    slow = threading.Event()
+
+    def request(method, url, **kwargs):
+        if url == 'http://a/v2':
+            slow.wait(5)
+            return _response('a')
+        return _response('b')
+
+    with patch.object(factomd.session, 'request', side_effect=request):
+        with patch.object(factomd.pool, 'acquire', side_effect=factomd.pool.nodes):
+            assert factomd.heights() == 'b'
+        assert hedging.stats['hedged'] == 1
+        slow.set()
+
+        # Writes are never hedged
+        with patch.object(factomd.pool, 'acquire', side_effect=factomd.pool.nodes):
+            assert factomd.commit_entry('00') == 'a'
+    assert hedging.stats['requests'] == 1
+
+
+def test_cancelled_hedge_releases_node():
+    hedging = HedgingPolicy(initial_delay=0.01)
+    factomd = Factomd(host=['http://a', 'http://b'], hedging=hedging)
+    submit = hedging.submit
+    # The hedge is queued behind other reads and never starts
+    submitted = [lambda *args: submit(*args), lambda *args: (Future(), threading.Event())]
+
+    def request(method, url, **kwargs):
+        time.sleep(0.05)
+        return _response(url)
+
+    with patch.object(factomd.session, 'request', side_effect=request):
+        with patch.object(hedging, 'submit', side_effect=lambda *args: submitted.pop(0)(*args)):
+            factomd.heights()
+    assert hedging.stats['hedged'] == 1
+    assert [n.outstanding for n in factomd.pool.nodes] == [0, 0]
+
+
+def test_queued_reads_not_hedged():
+    # Reads waiting for one of the two threads aren't slow, only queued
+    hedging = HedgingPolicy(initial_delay=0.08, max_workers=2)
+    factomd = Factomd(host=['http://a', 'http://b', 'http://c'], hedging=hedging)
+
+    def request(method, url, **kwargs):
+        time.sleep(0.05)
+        return _response(url)
+
+    def read():
+        for _ in range(2):
+            factomd.heights()
+
+    with patch.object(factomd.session, 'request', side_effect=request):
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert hedging.stats['requests'] == 16
+    assert hedging.stats['hedged'] == 0
+    assert [n.outstanding for n in factomd.pool.nodes] == [0, 0, 0]
+
+
+def test_hedged_errors():
+    factomd = Factomd(host=['http://a', 'http://b'], hedging=HedgingPolicy(initial_delay=5))
+
+    def request(method, url, **kwargs):
+        if url == 'http://a/v2':
+            raise ConnectionError()
+        return _response('b')
+
+    # A failed first read is hedged straight away
+    with patch.object(factomd.session, 'request', side_effect=request):
+        with patch.object(factomd.pool, 'acquire', side_effect=factomd.pool.nodes):
+            assert factomd.heights() == 'b'
+    with patch.object(factomd.session, 'request', side_effect=ConnectionError()):
+        with pytest.raises(ConnectionError):
+            factomd.heights()
@@ -1,5 +1,8 @@
+from unittest.mock import patch
+
 import pytest
-from requests import Request
+from requests import Request, Response, Session
+from requests.exceptions import ConnectionError, Timeout
 
 from factom.session import FactomAPISession
 
@@ -23,3 +26,39 @@ def test_basic_auth(fake_request):
     r = s.prepare_request(fake_request)
 
     assert r.headers['Authorization'] == 'Basic dXNlcjpwYXNz'
+
+
+def test_timeout_and_pool():
+    s = FactomAPISession(pool_size=4, pool_block=True, timeout=(1, 5))
+    adapter = s.get_adapter('http://someurl/')
+
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_block
+    with patch.object(Session, 'request') as request:
+        s.request('POST', 'http://someurl/')
+    assert request.call_args[1]['timeout'] == (1, 5)
+
+
+def test_retry():
+    s = FactomAPISession(retries=2, backoff=0)
+    unavailable = Response()
+    unavailable.status_code = 503
+    ok = Response()
+    ok.status_code = 200
+
+    with patch.object(Session, 'request', side_effect=[ConnectionError(), unavailable, ok]):
+        assert s.request('POST', 'http://someurl/', retry=True) is ok
+    with patch.object(Session, 'request', side_effect=[unavailable, ok]):
+        assert s.request('POST', 'http://someurl/') is unavailable
+    with patch.object(Session, 'request', side_effect=[Timeout()] * 3):
+        with pytest.raises(Timeout):
+            s.request('POST', 'http://someurl/', retry=True)
+
+
+def test_positional_args():
+    s = FactomAPISession(retries=2)
+
+    with patch.object(Session, 'request') as request:
+        s.request('GET', 'http://someurl/', {'a': 1})
+    assert request.call_args[0] == ('GET', 'http://someurl/', {'a': 1})
+    assert request.call_count == 1
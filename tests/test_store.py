@@ -0,0 +1,27 @@
+from multiprocessing import get_context
+
+from factom.store import BlockStore
+
+
+def _read(path, key):
+    return BlockStore(path).get(key)
+
+
+def test_store(tmp_path):
+    path = str(tmp_path / 'blocks.db')
+    s = BlockStore(path)
+    s.set('entry:a', b'{"result": 1}')
+    s.set('entry:a', b'{"result": 2}')  # Stored objects are immutable
+
+    assert s.get('entry:a') == b'{"result": 1}'
+    assert s.get('entry:b') is None
+    assert 'entry:a' in s
+    assert len(BlockStore(path)) == 1
+
+
+def test_store_shared_across_processes(tmp_path):
+    path = str(tmp_path / 'blocks.db')
+    BlockStore(path).set('entry:a', b'data')
+
+    with get_context('spawn').Pool(2) as pool:
+        assert pool.starmap(_read, [(path, 'entry:a')] * 2) == [b'data', b'data']
@@ -0,0 +1,93 @@
+from unittest.mock import Mock
+
+from factom.exceptions import FactomAPIError, InternalError, InvalidParams, RepeatedCommit
+from factom.submit import BulkSubmitter
+
+from . import CHAIN_ID
+
+
+def _calls(name):
+    return {
+        'commit': {'params': {'message': 'commit ' + name}},
+        'reveal': {'params': {'entry': 'reveal ' + name}},
+    }
+
+
+def _submitter(**kwargs):
+    factomd, walletd = Mock(), Mock()
+    walletd.compose_entry.side_effect = lambda chain_id, ext_ids, content, ec: _calls(
+        content.decode())
+    walletd.compose_chain.side_effect = lambda ext_ids, content, ec: _calls(content.decode())
+    factomd.reveal_entry.side_effect = lambda entry: {'entry': entry}
+    factomd.reveal_chain.side_effect = lambda entry: {'chain': entry}
+    return BulkSubmitter(factomd, walletd, backoff=0, **kwargs), factomd
+
+
+def test_submit():
+    submitter, factomd = _submitter(max_workers=4)
+    entries = [{'ext_ids': [], 'content': b'chain'}]
+    entries += [{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': str(i).encode()}
+                for i in range(20)]
+
+    results = list(submitter.submit(entries))
+
+    assert [r['entry'] for r in results] == entries
+    assert results[0]['reveal'] == {'chain': 'reveal chain'}
+    assert [r['reveal'] for r in results[1:]] == [{'entry': 'reveal {}'.format(i)}
+                                                  for i in range(20)]
+    assert factomd.commit_entry.call_count == 20
+    assert not any(r['error'] or r['repeated_commit'] for r in results)
+
+
+def test_submit_retries_without_committing_twice():
+    submitter, factomd = _submitter()
+    factomd.commit_entry.side_effect = [InternalError(), RepeatedCommit()]
+    factomd.reveal_entry.side_effect = [InternalError(), {'entry': 'revealed'}]
+
+    result, = submitter.submit([{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': b'x'}])
+
+    assert result['repeated_commit']
+    assert result['reveal'] == {'entry': 'revealed'}
+    assert factomd.commit_entry.call_count == 2
+    assert factomd.reveal_entry.call_count == 2
+
+
+def test_submit_reports_errors():
+    submitter, factomd = _submitter(retries=2)
+    error = InternalError()
+    factomd.reveal_entry.side_effect = error
+
+    result, = submitter.submit([{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': b'x'}])
+
+    assert result['error'] is error
+    assert result['reveal'] is None
+    assert factomd.reveal_entry.call_count == 3
+
+
+def test_submit_does_not_retry_permanent_errors():
+    submitter, factomd = _submitter(retries=2)
+    unavailable = FactomAPIError(response=Mock(status_code=503))
+    factomd.commit_entry.side_effect = [unavailable, None]
+    error = InvalidParams()
+    factomd.reveal_entry.side_effect = error
+
+    result, = submitter.submit([{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': b'x'}])
+
+    assert result['error'] is error
+    assert factomd.commit_entry.call_count == 2
+    assert factomd.reveal_entry.call_count == 1
+
+
+def test_submit_reports_bad_entries():
+    submitter, factomd = _submitter()
+    entries = [{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': b'x' * 10241}]
+    entries += [{'chain_id': CHAIN_ID, 'ext_ids': [], 'content': str(i).encode()} for i in range(3)]
+    entries.append({'chain_id': CHAIN_ID, 'content': b'no ext_ids'})
+
+    results = list(submitter.submit(entries))
+
+    assert isinstance(results[0]['error'], ValueError)
+    assert isinstance(results[4]['error'], ValueError)
+    assert [r['reveal'] for r in results[1:4]] == [{'entry': 'reveal {}'.format(i)}
+                                                   for i in range(3)]
+    assert factomd.commit_entry.call_count == 3
@@ -0,0 +1,87 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from factom.utils import (
+    PackedBlockStack,
+    chain_id_from_ext_ids,
+    chain_ids_from_ext_ids,
+    entry_cost,
+    entry_costs,
+    entry_hash,
+    entry_hashes,
+    marshal_entry,
+    ordered_map
+)
+
+from .integration.test_api import CHAIN_ID, ENTRY_2, REVEAL_ENTRY_MSG
+
+
+def test_ordered_map():
+    def slow_square(x):
+        time.sleep(random.random() / 100)
+        return x * x
+
+    assert list(ordered_map(slow_square, range(50), window=8, max_workers=4)) == [
+        x * x for x in range(50)
+    ]
+
+
+def test_ordered_map_window():
+    consumed = []
+
+    def items():
+        for x in range(100):
+            consumed.append(x)
+            yield x
+
+    results = ordered_map(lambda x: x, items(), window=5)
+    assert next(results) == 0
+    assert len(consumed) == 5
+    results.close()
+
+
+def test_packed_block_stack():
+    stack = PackedBlockStack()
+    stack.push('aa' * 32, 10)
+    stack.push(bytes.fromhex('bb' * 32), 20)
+
+    assert len(stack) == 2
+    assert stack.pop() == ('bb' * 32, 20)
+    assert stack.pop() == ('aa' * 32, 10)
+    with pytest.raises(IndexError):
+        stack.pop()
+
+
+def test_entry():
+    entry = marshal_entry(CHAIN_ID, [b'entry', b'id'], b'entry_content')
+
+    assert entry.hex() == REVEAL_ENTRY_MSG
+    assert entry_hash(entry).hex() == ENTRY_2
+    assert entry_cost(entry) == 1
+    assert chain_id_from_ext_ids([b'chain', '6964']).hex() == CHAIN_ID
+
+
+def test_entry_cost():
+    assert entry_cost(marshal_entry(CHAIN_ID, [], b'')) == 1
+    assert entry_cost(marshal_entry(CHAIN_ID, [], b'x' * 1024)) == 1
+    assert entry_cost(marshal_entry(CHAIN_ID, [b'x'], b'x' * 1024)) == 2
+    assert entry_cost(marshal_entry(CHAIN_ID, [], b'x' * 10240)) == 10
+    with pytest.raises(ValueError):
+        marshal_entry(CHAIN_ID, [], b'x' * 10241)
+
+
+def test_batches():
+    entries = [marshal_entry(CHAIN_ID, [b'%d' % i], b'x' * i * 100) for i in range(30)]
+    ext_ids = [[b'chain', memoryview(b'%d' % i)] for i in range(30)]
+    hashes = [entry_hash(e) for e in entries]
+    chain_ids = [chain_id_from_ext_ids([b'chain', b'%d' % i]) for i in range(30)]
+
+    assert entry_hashes(memoryview(e) for e in entries) == hashes
+    assert chain_ids_from_ext_ids(ext_ids) == chain_ids
+    assert entry_costs(entries) == [entry_cost(e) for e in entries]
+    with ProcessPoolExecutor(2) as executor:
+        assert entry_hashes([memoryview(e) for e in entries], executor, chunk_size=7) == hashes
+        assert chain_ids_from_ext_ids(ext_ids, executor, chunk_size=7) == chain_ids